@@ -1,18 +1,38 @@
-import re
+import io
+
+from ast_nodes import Assign, BinOp, Name, Node, Num, write_tree
+from lexer import Lexer
+from precedence import CLOSE, OPEN, parse_operators
+
+token_spec = [
+    ('NUMBER', r'\d+'), ('ID', r'[a-zA-Z_][a-zA-Z_0-9]*'),
+    ('ASSIGN', r':='), ('SEMI', r';'), ('LPAREN', r'\('), ('RPAREN', r'\)'),
+    ('PLUS', r'\+'), ('MULT', r'\*'), ('MINUS', r'-'), ('DIV', r'/'),
+    ('SKIP', r'[ \t\r]+'), ('NEWLINE', r'\n')
+]
+lexer = Lexer(token_spec)
+
+def iter_tokens(expression):
+    return lexer.tokenize(expression)
 
 def tokenize(expression):
-    token_spec = [
-        ('NUMBER', r'\d+'), ('ID', r'[a-zA-Z_][a-zA-Z_0-9]*'),
-        ('ASSIGN', r':='), ('SEMI', r';'), ('LPAREN', r'\('), ('RPAREN', r'\)'),
-        ('PLUS', r'\+'), ('MULT', r'\*'), ('MINUS', r'-'), ('DIV', r'/'),
-        ('SKIP', r'[ \t]+'), ('NEWLINE', r'\n')
-    ]
-    tokens = [(m.lastgroup, m.group()) for m in re.finditer('|'.join(f'(?P<{t}>{r})' for t, r in token_spec), expression) if m.lastgroup not in ('SKIP', 'NEWLINE')]
-    return tokens
+    return list(lexer.tokenize(expression))
+
+def tokenize_file(path):
+    return lexer.tokenize_file(path)
+
+# Token roles for the iterative expression parser (see precedence.py)
+EXPRESSION_CLASSES = {
+    'NUMBER': lambda token: Num(int(token[1]), token[1]), 'ID': lambda token: Name(token[1]),
+    'LPAREN': OPEN, 'RPAREN': CLOSE,
+    'PLUS': 1, 'MINUS': 1, 'MULT': 2, 'DIV': 2,
+}
 
 class AdaParser:
-    def __init__(self, tokens):  # FIXED: Corrected constructor name
+    def __init__(self, tokens, iterative=True):  # FIXED: Corrected constructor name
+        # iterative=False selects the recursive-descent expression parser
         self.tokens, self.pos = tokens, 0
+        self.iterative = iterative
 
     def current_token(self):
         return self.tokens[self.pos] if self.pos < len(self.tokens) else None
@@ -24,8 +44,11 @@ class AdaParser:
         return False
 
     def parse_factor(self):
-        if self.eat('NUMBER') or self.eat('ID'):
-            return {'Value': self.tokens[self.pos - 1][1]}
+        if self.eat('NUMBER'):
+            value = self.tokens[self.pos - 1][1]
+            return Num(int(value), value)
+        if self.eat('ID'):
+            return Name(self.tokens[self.pos - 1][1])
         if self.eat('LPAREN'):
             expr = self.parse_expression()
             if not self.eat('RPAREN'):
@@ -36,43 +59,65 @@ class AdaParser:
     def parse_term(self):
         node = self.parse_factor()
         while self.eat('MULT') or self.eat('DIV'):
-            node = {'Operator': self.tokens[self.pos - 1][1], 'Left': node, 'Right': self.parse_factor()}
+            node = BinOp(self.tokens[self.pos - 1][1], node, self.parse_factor())
         return node
 
     def parse_expression(self):
         node = self.parse_term()
         while self.eat('PLUS') or self.eat('MINUS'):
-            node = {'Operator': self.tokens[self.pos - 1][1], 'Left': node, 'Right': self.parse_term()}
+            node = BinOp(self.tokens[self.pos - 1][1], node, self.parse_term())
+        return node
+
+    def parse_expression_iterative(self):
+        # Explicit operand/operator stacks, so nesting depth is bounded by memory, not recursion
+        node, self.pos = parse_operators(self.tokens, self.pos, EXPRESSION_CLASSES, BinOp, stop=True)
         return node
 
     def parse_assignment(self):
         if self.eat('ID'):
             var = self.tokens[self.pos - 1][1]
             if self.eat('ASSIGN'):
-                expr = self.parse_expression()
+                expr = self.parse_expression_iterative() if self.iterative else self.parse_expression()
                 if not self.eat('SEMI'):
                     raise SyntaxError("Missing semicolon")
-                return {'Assignment': {'Variable': var, 'Expression': expr}}
+                return Assign(var, expr)
         raise SyntaxError("Invalid assignment")
 
-    def parse(self):
-        result = []
+    def parse_statements(self):
+        statements = []
         while self.pos < len(self.tokens):
-            result.append(self.format_tree(self.parse_assignment(), 0))
-        return "\n".join(result)
+            statements.append(self.parse_assignment())
+        return statements
+
+    def parse(self):
+        out = io.StringIO()
+        self.write(out)
+        return out.getvalue()
+
+    def write(self, stream):
+        # Streams the format_tree rendering of every statement without building nested strings
+        for i, statement in enumerate(self.parse_statements()):
+            if i:
+                stream.write("\n")
+            write_tree(statement, stream)
 
     def format_tree(self, node, level):
         indent = ' ' * level
+        if isinstance(node, Node):
+            out = io.StringIO()
+            write_tree(node, out, level)
+            return out.getvalue()
         if isinstance(node, (str, int)):  # FIXED: Handle strings correctly
             return f"{indent}{node}"
         return "\n".join(f"{indent}{k}:\n{self.format_tree(v, level + 1)}" for k, v in node.items())
 
 # Example usage:
 # expression = input("Enter the expression: ")
-expression = "x := 5 + 3;"
-try:
-    tokens = tokenize(expression)
-    parser = AdaParser(tokens)
-    print(parser.parse())
-except SyntaxError as e:
-    print("Syntax Error:", e)
+if __name__ == "__main__":
+    expression = "x := 5 + 3;"
+    try:
+        tokens = tokenize(expression)
+        parser = AdaParser(tokens)
+        print(parser.parse())
+    except SyntaxError as e:
+        print("Syntax Error:", e)
@@ -0,0 +1,128 @@
+# Slotted AST nodes shared by the front ends (ada.py, mini_compiler.py).
+# A node costs one small fixed-size object instead of a dict per level.
+
+class Node:
+    __slots__ = ()
+
+    # repr and == walk the tree on explicit stacks, so they work at any depth the parsers produce
+    def __repr__(self):
+        # The stack holds nodes still to print and strings already rendered
+        parts = []
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if not isinstance(item, Node):
+                parts.append(item)
+                continue
+            stack.append(")")
+            for i in range(len(item.__slots__) - 1, -1, -1):
+                name = item.__slots__[i]
+                value = getattr(item, name)
+                stack.append(value if isinstance(value, Node) else repr(value))
+                stack.append(f"{', ' if i else ''}{name}=")
+            stack.append(f"{type(item).__name__}(")
+        return "".join(parts)
+
+    def __eq__(self, other):
+        stack = [(self, other)]
+        while stack:
+            a, b = stack.pop()
+            if type(a) is not type(b):
+                return False
+            for name in a.__slots__:
+                x, y = getattr(a, name), getattr(b, name)
+                if isinstance(x, Node):
+                    stack.append((x, y))
+                elif x != y:
+                    return False
+        return True
+
+    __hash__ = None
+
+class Num(Node):
+    # text is the literal as written (e.g. "007"), which the tree views print
+    __slots__ = ("value", "text")
+
+    def __init__(self, value, text=None):
+        self.value = value
+        self.text = str(value) if text is None else text
+
+class Name(Node):
+    # sym is the SymbolTable id of the name when the lexer interned it, else None
+    __slots__ = ("id", "sym")
+
+    def __init__(self, id, sym=None):
+        self.id = id
+        self.sym = sym
+
+class BinOp(Node):
+    __slots__ = ("op", "left", "right")
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+class Assign(Node):
+    # sym is the SymbolTable id of target, as for Name
+    __slots__ = ("target", "value", "sym")
+
+    def __init__(self, target, value, sym=None):
+        self.target = target
+        self.value = value
+        self.sym = sym
+
+def to_dict(node):
+    # Compatibility view: the nested-dict layout AdaParser used to build, as read by format_tree
+    if isinstance(node, Assign):
+        return {'Assignment': {'Variable': node.target, 'Expression': to_dict(node.value)}}
+    if isinstance(node, BinOp):
+        return {'Operator': node.op, 'Left': to_dict(node.left), 'Right': to_dict(node.right)}
+    if isinstance(node, Num):
+        return {'Value': node.text}
+    if isinstance(node, Name):
+        return {'Value': node.id}
+    raise TypeError(f"Not an AST node: {node!r}")
+
+def write_tree(node, stream, level=0):
+    # Writes the same text as AdaParser.format_tree(to_dict(node), level), iteratively, so depth is unbounded
+    write = stream.write
+    first = True
+    stack = [(node, level)]
+    while stack:
+        item, level = stack.pop()
+        indent = ' ' * level
+        if isinstance(item, str):
+            lines = (f"{indent}{item}",)
+        elif isinstance(item, Assign):
+            lines = (f"{indent}Assignment:", f"{indent} Variable:", f"{indent}  {item.target}", f"{indent} Expression:")
+            stack.append((item.value, level + 2))
+        elif isinstance(item, BinOp):
+            lines = (f"{indent}Operator:", f"{indent} {item.op}", f"{indent}Left:")
+            stack.append((item.right, level + 1))
+            stack.append(("Right:", level))
+            stack.append((item.left, level + 1))
+        elif isinstance(item, Num):
+            lines = (f"{indent}Value:", f"{indent} {item.text}")
+        elif isinstance(item, Name):
+            lines = (f"{indent}Value:", f"{indent} {item.id}")
+        else:
+            raise TypeError(f"Not an AST node: {item!r}")
+        for line in lines:
+            if not first:
+                write("\n")
+            write(line)
+            first = False
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        count += 1
+        if isinstance(item, Assign):
+            stack.append(item.value)
+        elif isinstance(item, BinOp):
+            stack.append(item.left)
+            stack.append(item.right)
+    return count
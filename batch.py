@@ -0,0 +1,148 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from ast_nodes import count_nodes
+from instrument import DISABLED, Instrumentation
+from ir import IRProgram, lower
+from mini_compiler import build_parse_tree, check_semantics, lex
+from optimizer import optimize
+from regalloc import allocate, format_instruction
+from symbols import SymbolTable
+
+class Compilation:
+    # Everything one compilation touches lives here, so any number can run side by side
+    def __init__(self, source, name="<string>", num_registers=8, optimize_code=True, instrumentation=DISABLED):
+        self.source = source
+        self.name = name
+        self.num_registers = num_registers
+        self.optimize_code = optimize_code
+        self.syntax_trees = []
+        self.symbols = SymbolTable()
+        self.errors = []
+        self.program = IRProgram(self.symbols)
+        self.instructions = []
+        self.report = None
+        self.instrumentation = instrumentation
+
+    def run(self):
+        phase = self.instrumentation.phase
+        with phase("lex") as p:
+            tokens_by_line = lex(self.source, self.symbols)
+            if p.enabled:
+                p.count("lines", len(tokens_by_line))
+                p.count("tokens", sum(len(tokens) for _, _, tokens in tokens_by_line))
+        with phase("parse") as p:
+            for line_no, _, tokens in tokens_by_line:
+                if tokens:
+                    try:
+                        self.syntax_trees.append(build_parse_tree(tokens))
+                    except SyntaxError as e:
+                        self.errors.append(f"{self.name}:{line_no}: {e}")
+            if p.enabled:
+                p.count("statements", len(self.syntax_trees))
+                p.count("nodes", sum(count_nodes(tree) for tree in self.syntax_trees))
+        if self.errors:
+            return self
+        with phase("semantic") as p:
+            lines = [line_no for line_no, _, tokens in tokens_by_line if tokens]
+            _, semantic_errors = check_semantics(self.syntax_trees, self.symbols, lines)
+            self.errors.extend(f"{self.name}: {error}" for error in semantic_errors)
+            p.count("symbols", len(self.symbols.symbols))
+            p.count("errors", len(semantic_errors))
+        with phase("ir") as p:
+            lower(self.program, self.syntax_trees)
+            p.count("quads", len(self.program.code))
+            p.count("temps", self.program.n_temps)
+        if self.optimize_code:
+            with phase("optimize") as p:
+                before = len(self.program.code)
+                optimize(self.program)
+                p.count("quads", len(self.program.code))
+                p.count("removed", before - len(self.program.code))
+        with phase("codegen") as p:
+            self.instructions, self.report = allocate(self.program, self.num_registers)
+            p.count("instructions", self.report["instructions"])
+            p.count("spills", self.report["spills"])
+        return self
+
+    def result(self):
+        # Plain data only, so results pickle cheaply back from worker processes.
+        # ok means target code was generated and nothing was reported, semantic errors included.
+        return {"name": self.name,
+                "ok": self.report is not None and not self.errors,
+                "errors": self.errors,
+                "statements": len(self.syntax_trees),
+                "target": [format_instruction(instruction) for instruction in self.instructions],
+                "report": self.report,
+                "stats": self.instrumentation.report() if self.instrumentation.enabled else None}
+
+def compile_source(source, name="<string>", num_registers=8, optimize_code=True, stats=False, profile=False):
+    # stats adds per-phase times, counts and tracemalloc peaks to the result; profile adds cProfile hot spots
+    instrumentation = Instrumentation(name, memory=True, profile=profile) if stats or profile else DISABLED
+    try:
+        return Compilation(source, name, num_registers, optimize_code, instrumentation).run().result()
+    except SyntaxError as e:
+        return failed_result(name, f"{name}: {e}", instrumentation.report() if instrumentation.enabled else None)
+    finally:
+        instrumentation.close()
+
+def failed_result(name, error, stats=None):
+    return {"name": name, "ok": False, "errors": [error], "statements": 0, "target": [], "report": None,
+            "stats": stats}
+
+def compile_file(path, num_registers=8, optimize_code=True, stats=False, profile=False):
+    # A file that cannot be read fails on its own instead of stopping the batch
+    name = os.fspath(path)
+    try:
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return failed_result(name, f"{name}: cannot read: {e}")
+    return compile_source(source, name, num_registers, optimize_code, stats, profile)
+
+def compile_many(paths, workers=None, chunksize=None, num_registers=8, optimize_code=True, stats=False):
+    # Results come back in the order of paths; workers=1 compiles in this process
+    paths = list(paths)
+    job = partial(compile_file, num_registers=num_registers, optimize_code=optimize_code, stats=stats)
+    workers = min(workers or os.cpu_count() or 1, len(paths) or 1)
+    if workers == 1:
+        return [job(path) for path in paths]
+    if chunksize is None:
+        # A few chunks per worker keeps the pool balanced without a round trip per file
+        chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(job, paths, chunksize=chunksize))
+
+def main(argv):
+    workers = None
+    stats_path = None
+    while argv[:1] in (["-j"], ["--stats"]):
+        if argv[0] == "-j":
+            workers = int(argv[1])
+        else:
+            stats_path = argv[1]
+        argv = argv[2:]
+    started = time.perf_counter()
+    results = compile_many(argv, workers, stats=stats_path is not None)
+    elapsed = time.perf_counter() - started
+    if stats_path is not None:
+        with open(stats_path, "w", encoding="utf-8") as f:
+            json.dump([result["stats"] for result in results], f, indent=2)
+    failed = 0
+    for result in results:
+        for error in result["errors"]:
+            print(error)
+        if result["ok"]:
+            print(f"{result['name']}: {result['statements']} statements, "
+                  f"{result['report']['instructions']} instructions")
+        else:
+            failed += 1
+    print(f"{len(results)} files, {failed} failed, {elapsed:.2f}s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
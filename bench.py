@@ -0,0 +1,279 @@
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from workloads import chain_statement, generate_assignments, generate_grammar, generate_program, nested_statement
+
+# Modules that must never be pulled in just by importing a parser module
+HEAVY_MODULES = ("pandas", "numpy")
+
+IMPORT_PROBE = """
+import resource, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, ",".join(heavy))
+"""
+
+def bench_import(module, repeat=5):
+    # Each run is a fresh interpreter so nothing is already cached in sys.modules
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                             capture_output=True, text=True, check=True).stdout.split(" ")
+        runs.append((float(out[0]), int(out[1]), out[2].strip()))
+    seconds, max_rss_kb, heavy = min(runs)
+    return {"module": module, "seconds": seconds, "max_rss_kb": max_rss_kb,
+            "heavy_modules": heavy.split(",") if heavy else []}
+
+def check_imports(modules=("ll1", "slr", "grammar", "render"), budget=0.05):
+    failed = False
+    for module in modules:
+        r = bench_import(module)
+        ok = not r["heavy_modules"] and r["seconds"] <= budget
+        failed = failed or not ok
+        print(f"import {module:<8} {r['seconds'] * 1000:8.2f} ms  {r['max_rss_kb'] / 1024:6.1f} MB  "
+              f"{'ok' if ok else 'TOO HEAVY ' + ','.join(r['heavy_modules'])}")
+    return not failed
+
+def _traced_size(build):
+    tracemalloc.start()
+    try:
+        result = build()
+        return result, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+def bench_ast_memory(n_statements=20000):
+    from ada import AdaParser, tokenize
+    from ast_nodes import to_dict
+
+    tokens = tokenize(generate_program(n_statements))
+    statements, node_bytes = _traced_size(lambda: AdaParser(tokens).parse_statements())
+    _, dict_bytes = _traced_size(lambda: [to_dict(s) for s in statements])
+    print(f"AST for {n_statements} statements: slotted nodes {node_bytes / 2**20:.1f} MB, "
+          f"dict trees {dict_bytes / 2**20:.1f} MB ({dict_bytes / node_bytes:.1f}x)")
+    return {"statements": n_statements, "node_bytes": node_bytes, "dict_bytes": dict_bytes}
+
+def bench_deep_expressions(sizes=(25000, 50000, 100000)):
+    # Parse time should double with the input: deep nesting and long chains, no RecursionError
+    from ada import AdaParser, tokenize
+
+    results = []
+    for n in sizes:
+        for shape, source in (("nested", nested_statement(n)), ("chain", chain_statement(10 * n))):
+            tokens = tokenize(source)
+            started = time.perf_counter()
+            AdaParser(tokens).parse_statements()
+            elapsed = time.perf_counter() - started
+            results.append({"shape": shape, "size": n, "tokens": len(tokens), "seconds": elapsed})
+            print(f"{shape:<7} n={n:<7} {len(tokens):>8} tokens  {elapsed * 1000:8.1f} ms")
+    return results
+
+def bench_vm(n_statements=2000):
+    # Execution cost of the same program through different backend settings
+    from ir import IRProgram, lower
+    from mini_compiler import build_parse_tree, lex
+    from optimizer import optimize
+    from regalloc import allocate
+    from vm import assemble, benchmark, execute
+
+    trees = [build_parse_tree(tokens) for _, _, tokens in lex(generate_assignments(n_statements, ops="+-/")) if tokens]
+    memory = {f"v{i}": i % 7 + 1 for i in range(32)}
+    results = []
+    expected = None
+    for label, optimized, registers in (("plain, 3 regs", False, 3), ("plain, 16 regs", False, 16),
+                                        ("optimized, 16 regs", True, 16)):
+        program = lower(IRProgram(), trees)
+        if optimized:
+            optimize(program)
+        bytecode = assemble(allocate(program, registers)[0])
+        final = execute(bytecode, memory)
+        final = {name: final.get(name, memory.get(name, 0)) for name in program.names}
+        if expected is None:
+            expected = final
+        elif final != expected:
+            raise AssertionError(f"{label}: results differ from the unoptimized program")
+        r = benchmark(bytecode, memory, repeat=3, min_time=0.1)
+        results.append(dict(r, label=label))
+        print(f"{label:<20} {r['instructions']:>7} instructions  {r['seconds'] * 1000:7.2f} ms/run  "
+              f"{r['instructions_per_sec']:>12,.0f} instructions/sec")
+    return results
+
+def bench_tac(n_statements=20000):
+    # Single-pass TAC translation against the infix_to_postfix + postfix walk path; same TAC expected
+    from tac import IntermediateCodeGenerator
+
+    statements = generate_assignments(n_statements).splitlines()
+    results = []
+    outputs = []
+    for label, two_pass in (("two-pass", True), ("single-pass", False)):
+        best = float("inf")
+        for _ in range(3):
+            generator = IntermediateCodeGenerator()
+            started = time.perf_counter()
+            for statement in statements:
+                generator.generate_tac(statement, two_pass)
+            best = min(best, time.perf_counter() - started)
+        outputs.append(generator.tac_lines)
+        results.append({"label": label, "statements": n_statements, "seconds": best})
+        print(f"{label:<12} {n_statements} statements  {best * 1000:8.1f} ms  "
+              f"{n_statements / best:10,.0f} statements/sec")
+    if outputs[0] != outputs[1]:
+        raise AssertionError("single-pass TAC differs from the two-pass path")
+    return results
+
+def bench_tac_stream_memory(sizes=(20000, 80000)):
+    # Memory held by stream_tac after a stream of distinct names and constants must not grow with its length
+    from tac import IntermediateCodeGenerator
+
+    results = []
+    for n in sizes:
+        generator = IntermediateCodeGenerator()
+        tracemalloc.start()
+        try:
+            for _ in generator.stream_tac(f"v{i} = w{i} + {i}" for i in range(n)):
+                pass
+            held, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        results.append({"statements": n, "held_bytes": held, "peak_bytes": peak})
+        print(f"stream_tac {n:>7} statements  held {held / 1024:8.1f} KB  peak {peak / 1024:8.1f} KB")
+    if results[-1]["held_bytes"] > 2 * results[0]["held_bytes"] + 64 * 1024:
+        raise AssertionError("stream_tac memory grows with the length of the stream")
+    return results
+
+def bench_lexers(n_statements=5000):
+    # Table-driven DFA scanners generated from the regex specs, against the re-based Lexer
+    import ada
+    import mini_compiler
+    from lexgen import DFAScanner, compile_spec
+
+    results = []
+    for label, module, spec, source in (
+            ("ada", ada, ada.token_spec, generate_program(n_statements)),
+            ("mini", mini_compiler, mini_compiler.token_specification, generate_assignments(n_statements))):
+        scanner = DFAScanner(compile_spec(spec))
+        timings = {}
+        outputs = {}
+        for name, tokenize in (("re", module.lexer.tokenize), ("dfa", scanner.tokenize)):
+            best = float("inf")
+            for _ in range(3):
+                started = time.perf_counter()
+                tokens = list(tokenize(source))
+                best = min(best, time.perf_counter() - started)
+            timings[name] = best
+            outputs[name] = tokens
+        if outputs["re"] != outputs["dfa"]:
+            raise AssertionError(f"{label}: DFA scanner tokens differ from the re lexer")
+        for name, seconds in timings.items():
+            print(f"{label:<5} {name:<4} {len(source) / seconds / 2**20:7.2f} MB/s  {len(outputs[name])} tokens")
+        results.append({"spec": label, "chars": len(source), "re_seconds": timings["re"], "dfa_seconds": timings["dfa"]})
+    return results
+
+def bench_calc(n_lines=50000, n_formulas=200, seed=0):
+    # A stream of repeated formulas: compiled once and cached, against compiling every line
+    from calc import Calculator
+
+    rnd = random.Random(seed)
+    formulas = []
+    for _ in range(n_formulas):
+        expr = str(rnd.randint(1, 99))
+        for _ in range(rnd.randint(2, 8)):
+            expr = f"({expr}) {rnd.choice('+-*/%')} {rnd.randint(1, 99)}"
+        formulas.append(expr)
+    lines = [rnd.choice(formulas) for _ in range(n_lines)]
+    results = []
+    for label, cache_size in (("no cache", 0), ("lru cache", 4096)):
+        calculator = Calculator(cache_size)
+        started = time.perf_counter()
+        total = sum(value for _, value, _ in calculator.evaluate_stream(lines))
+        elapsed = time.perf_counter() - started
+        results.append({"label": label, "lines": n_lines, "seconds": elapsed, "checksum": total})
+        print(f"{label:<10} {n_lines} lines  {elapsed * 1000:8.1f} ms  {n_lines / elapsed:12,.0f} lines/sec")
+    if results[0]["checksum"] != results[1]["checksum"]:
+        raise AssertionError("cached evaluation differs")
+    return results
+
+def bench_transforms(sizes=(1000, 2000, 4000, 8000)):
+    # Time should roughly double with the grammar
+    from grammar_transforms import transform
+
+    results = []
+    for n in sizes:
+        grammar = generate_grammar(n)
+        started = time.perf_counter()
+        transformed, changes = transform(grammar, "N0")
+        elapsed = time.perf_counter() - started
+        results.append({"nonterminals": n, "seconds": elapsed, "changes": len(changes)})
+        print(f"{n:>6} nonterminals -> {len(transformed):>6}  {len(changes):>6} changes  {elapsed * 1000:8.1f} ms")
+    return results
+
+def bench_incremental(sizes=(2000, 8000, 32000), n_edits=200, seed=0):
+    # Latency of a one-character edit should stay flat as the file grows; a full reparse grows with it
+    from ada import AdaParser, tokenize
+    from incremental import IncrementalDocument
+
+    rnd = random.Random(seed)
+    results = []
+    for n in sizes:
+        source = generate_program(n, seed) + "\n"
+        doc = IncrementalDocument(source)
+        started = time.perf_counter()
+        AdaParser(tokenize(source)).parse_statements()
+        full = time.perf_counter() - started
+        digits = [i for i, c in enumerate(source) if c.isdigit()]
+        started = time.perf_counter()
+        for _ in range(n_edits):
+            at = rnd.choice(digits)
+            doc.edit(at, at + 1, str(rnd.randint(0, 9)))
+        per_edit = (time.perf_counter() - started) / n_edits
+        if doc.statements() != AdaParser(tokenize(doc.text)).parse_statements():
+            raise AssertionError("incremental AST differs from a full reparse")
+        results.append({"statements": n, "full_seconds": full, "edit_seconds": per_edit})
+        print(f"{n:>6} statements  full reparse {full * 1000:8.1f} ms  edit {per_edit * 1e6:8.1f} us")
+    return results
+
+def bench_batch(n_files=200, n_statements=200):
+    # Wall time of compile_many on generated files, serial against the whole machine
+    import os
+    import tempfile
+    from batch import compile_many
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(n_files):
+            path = os.path.join(tmp, f"unit{i}.src")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(generate_assignments(n_statements, seed=i))
+            paths.append(path)
+        results = []
+        expected = None
+        for workers in sorted({1, os.cpu_count() or 1}):
+            started = time.perf_counter()
+            outputs = compile_many(paths, workers)
+            elapsed = time.perf_counter() - started
+            if expected is None:
+                expected = outputs
+            elif outputs != expected:
+                raise AssertionError(f"{workers} workers: output differs from the serial run")
+            results.append({"workers": workers, "files": n_files, "seconds": elapsed})
+            print(f"{workers:>3} workers  {n_files} files  {elapsed:7.2f} s  {n_files / elapsed:8.1f} files/sec")
+    return results
+
+if __name__ == "__main__":
+    ok = check_imports()
+    bench_ast_memory()
+    bench_deep_expressions()
+    bench_vm()
+    bench_tac()
+    bench_tac_stream_memory()
+    bench_lexers()
+    bench_calc()
+    bench_transforms()
+    bench_incremental()
+    bench_batch()
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,133 @@
+# Evaluator for the calculator grammar in arithmetic.txt: integers, + - * / %,
+# parentheses and unary minus, with C semantics (division and remainder truncate
+# toward zero; dividing by zero is an error). Each expression is compiled once to
+# a tree of closures and cached by its source text, so a repeated formula costs a
+# dictionary lookup and the calls of its closure tree.
+
+import sys
+from functools import lru_cache
+
+from ir import evaluate
+from lexer import Lexer
+from precedence import CLOSE, OPEN, parse_operators
+
+token_spec = [
+    ('NUMBER', r'[0-9]+'),
+    ('OP', r'[+\-*/%()]'),
+    ('SKIP', r'[ \t]+'),
+]
+lexer = Lexer(token_spec)
+
+# yacc: %left '+' '-'  %left '*' '/' '%'  %right UMINUS
+PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2, '%': 2}
+PREFIX = {'-': 3}
+UMINUS = 'neg'
+
+# Closure trees deeper than this are run as a postfix program instead, so long chains never recurse
+MAX_TREE_DEPTH = 200
+
+def divide(x, y):
+    if y == 0:
+        raise ZeroDivisionError("Division by zero")
+    return evaluate('/', x, y)
+
+def remainder(x, y):
+    if y == 0:
+        raise ZeroDivisionError("Modulo by zero")
+    return evaluate('%', x, y)
+
+def _constant(value):
+    return lambda: value
+
+def _negate(a):
+    return lambda: -a()
+
+def _binary(op, a, b):
+    # One specialised closure per operator: evaluation never looks the operator up again
+    if op == '+':
+        return lambda: a() + b()
+    if op == '-':
+        return lambda: a() - b()
+    if op == '*':
+        return lambda: a() * b()
+    if op == '/':
+        return lambda: divide(a(), b())
+    return lambda: remainder(a(), b())
+
+BINARY = {'+': lambda x, y: x + y, '-': lambda x, y: x - y, '*': lambda x, y: x * y,
+          '/': divide, '%': remainder}
+
+def _run_postfix(code):
+    def run():
+        stack = []
+        push, pop = stack.append, stack.pop
+        for item in code:
+            if item.__class__ is int:
+                push(item)
+            elif item == UMINUS:
+                push(-pop())
+            else:
+                y = pop()
+                push(BINARY[item](pop(), y))
+        return stack[0]
+    return run
+
+def compile_expression(text):
+    # Returns a zero-argument callable computing the value of text. parse_operators calls the
+    # callbacks in postfix order, so they record the postfix program while building the closure
+    # tree; operands are (closure, depth), the closure being None once depth passes the limit.
+    code = []
+    def number(token):
+        value = int(token[1])
+        code.append(value)
+        return _constant(value), 1
+    def negate(op, a):
+        code.append(UMINUS)
+        depth = a[1] + 1
+        return (_negate(a[0]) if depth <= MAX_TREE_DEPTH else None), depth
+    def binary(op, a, b):
+        code.append(op)
+        depth = max(a[1], b[1]) + 1
+        return (_binary(op, a[0], b[0]) if depth <= MAX_TREE_DEPTH else None), depth
+    classes = {'NUMBER': number, 'OP': dict(PRECEDENCE, **{'(': OPEN, ')': CLOSE})}
+    node, depth = parse_operators(list(lexer.tokenize(text)), 0, classes, binary, PREFIX, negate)[0]
+    return node if depth <= MAX_TREE_DEPTH else _run_postfix(code)
+
+class Calculator:
+    def __init__(self, cache_size=4096):
+        self.compile = lru_cache(maxsize=cache_size)(compile_expression)
+
+    def evaluate(self, text):
+        return self.compile(text.strip())()
+
+    def evaluate_stream(self, lines):
+        # Yields (line number, value, error) per non-blank line; an error does not stop the stream
+        compile = self.compile
+        for number, line in enumerate(lines, start=1):
+            text = line.strip()
+            if not text:
+                continue
+            try:
+                yield number, compile(text)(), None
+            except (SyntaxError, ArithmeticError) as e:
+                yield number, None, str(e)
+
+    def cache_info(self):
+        return self.compile.cache_info()
+
+def main(argv):
+    calculator = Calculator()
+    failed = False
+    streams = [open(path, encoding="utf-8") for path in argv] or [sys.stdin]
+    for stream in streams:
+        with stream:
+            for _, value, error in calculator.evaluate_stream(stream):
+                if error is None:
+                    print(f"Result: {value}")
+                else:
+                    print(f"Error: {error}")
+                    failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
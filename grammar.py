@@ -0,0 +1,162 @@
+EPSILON = "ε"
+END = "$"
+
+def iter_bits(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+class GrammarAnalysis:
+    # Symbols are dense integers: nonterminals first, then terminals (END is always a terminal).
+    # nullable, FIRST and FOLLOW are bitsets over terminal indices, stored as Python ints.
+    def __init__(self, productions, start_symbol=None, terminals=(), sets=None):
+        # sets = (nullable, first, follow) restores a previous analysis without recomputing it
+        self.nonterminals = list(productions)
+        self.start_symbol = start_symbol if start_symbol is not None else self.nonterminals[0]
+        seen = dict.fromkeys(terminals)
+        for rhs_list in productions.values():
+            for rhs in rhs_list:
+                for sym in rhs:
+                    if sym not in productions and sym != EPSILON:
+                        seen[sym] = None
+        seen.pop(END, None)
+        self.terminals = list(seen) + [END]
+        self.term_id = {t: i for i, t in enumerate(self.terminals)}
+        self.nt_id = {nt: i for i, nt in enumerate(self.nonterminals)}
+
+        n_nt = len(self.nonterminals)
+        # A symbol code below n_nt is a nonterminal, otherwise n_nt + terminal index
+        self.n_nonterminals = n_nt
+        self.prods = []
+        for lhs, rhs_list in productions.items():
+            for rhs in rhs_list:
+                self.prods.append((self.nt_id[lhs], tuple(self.encode(sym) for sym in rhs if sym != EPSILON)))
+
+        if sets is not None:
+            self.nullable, self.first, self.follow = sets
+            return
+        self.nullable = self._compute_nullable()
+        self.first = self._compute_first()
+        self.follow = self._compute_follow()
+
+    def encode(self, symbol):
+        if symbol in self.nt_id:
+            return self.nt_id[symbol]
+        return self.n_nonterminals + self.term_id[symbol]
+
+    def _compute_nullable(self):
+        n_nt = self.n_nonterminals
+        remaining = []
+        occurs = [[] for _ in range(n_nt)]
+        nullable = 0
+        work = []
+        for p, (lhs, rhs) in enumerate(self.prods):
+            remaining.append(len(rhs))
+            for sym in rhs:
+                if sym < n_nt:
+                    occurs[sym].append(p)
+                else:
+                    remaining[p] = -1
+            if remaining[p] == 0 and not nullable >> lhs & 1:
+                nullable |= 1 << lhs
+                work.append(lhs)
+        while work:
+            for p in occurs[work.pop()]:
+                if remaining[p] > 0:
+                    remaining[p] -= 1
+                    lhs = self.prods[p][0]
+                    if remaining[p] == 0 and not nullable >> lhs & 1:
+                        nullable |= 1 << lhs
+                        work.append(lhs)
+        return nullable
+
+    def _compute_first(self):
+        n_nt = self.n_nonterminals
+        first = [0] * n_nt
+        users = [set() for _ in range(n_nt)]
+        for lhs, rhs in self.prods:
+            for sym in rhs:
+                if sym >= n_nt:
+                    first[lhs] |= 1 << (sym - n_nt)
+                    break
+                if sym != lhs:
+                    users[sym].add(lhs)
+                if not self.nullable >> sym & 1:
+                    break
+        self._propagate(first, users)
+        return first
+
+    def _compute_follow(self):
+        n_nt = self.n_nonterminals
+        follow = [0] * n_nt
+        follow[self.nt_id[self.start_symbol]] |= 1 << self.term_id[END]
+        users = [set() for _ in range(n_nt)]
+        for lhs, rhs in self.prods:
+            suffix, vanishes = 0, True
+            for sym in reversed(rhs):
+                if sym < n_nt:
+                    follow[sym] |= suffix
+                    if vanishes and sym != lhs:
+                        users[lhs].add(sym)
+                    suffix = self.first[sym] | (suffix if self.nullable >> sym & 1 else 0)
+                    vanishes = vanishes and bool(self.nullable >> sym & 1)
+                else:
+                    suffix, vanishes = 1 << (sym - n_nt), False
+        self._propagate(follow, users)
+        return follow
+
+    @staticmethod
+    def _propagate(sets, users):
+        # sets[b] |= sets[a] for every b in users[a], iterated to a fixed point
+        work = [a for a in range(len(sets)) if sets[a] and users[a]]
+        queued = set(work)
+        while work:
+            a = work.pop()
+            queued.discard(a)
+            bits = sets[a]
+            for b in users[a]:
+                merged = sets[b] | bits
+                if merged != sets[b]:
+                    sets[b] = merged
+                    if b not in queued and users[b]:
+                        queued.add(b)
+                        work.append(b)
+
+    def first_of(self, symbols):
+        # FIRST bits of a symbol sequence and whether the whole sequence is nullable
+        n_nt = self.n_nonterminals
+        bits = 0
+        for sym in symbols:
+            if sym >= n_nt:
+                return bits | 1 << (sym - n_nt), False
+            bits |= self.first[sym]
+            if not self.nullable >> sym & 1:
+                return bits, False
+        return bits, True
+
+    def names(self, bits):
+        return {self.terminals[i] for i in iter_bits(bits)}
+
+    def is_nullable(self, nt):
+        return bool(self.nullable >> self.nt_id[nt] & 1)
+
+    def first_set(self, symbol):
+        if symbol == EPSILON:
+            return {EPSILON}
+        if symbol not in self.nt_id:
+            return {symbol}
+        result = self.names(self.first[self.nt_id[symbol]])
+        if self.is_nullable(symbol):
+            result.add(EPSILON)
+        return result
+
+    def first_of_names(self, symbols):
+        bits, vanishes = self.first_of([self.encode(s) for s in symbols if s != EPSILON])
+        result = self.names(bits)
+        if vanishes:
+            result.add(EPSILON)
+        return result
+
+    def follow_set(self, nt):
+        return self.names(self.follow[self.nt_id[nt]])
@@ -0,0 +1,315 @@
+# Grammar preprocessing for ll1.py: useless-symbol removal, left-recursion elimination
+# and left factoring. Grammars use the usual dict layout, nonterminal -> list of
+# right-hand sides, the first key being the start symbol. Every pass returns a new
+# grammar plus a list of (pass, description) changes; diff_grammars shows the result.
+#
+# Each pass is linear in the grammar size except where the grammar forces more work:
+# substitution for indirect left recursion only runs inside left-recursive cycles.
+
+import difflib
+import sys
+
+from grammar import EPSILON
+
+def _rhs(rhs):
+    return [sym for sym in rhs if sym != EPSILON]
+
+def _out(rhs):
+    return list(rhs) if rhs else [EPSILON]
+
+def fresh_name(base, taken):
+    name = base + "'"
+    while name in taken:
+        name += "'"
+    taken.add(name)
+    return name
+
+def format_production(lhs, rhs):
+    return f"{lhs} -> {' '.join(rhs) if rhs else EPSILON}"
+
+def format_grammar(productions):
+    return [format_production(lhs, _rhs(rhs)) for lhs, rhs_list in productions.items() for rhs in rhs_list]
+
+def diff_grammars(before, after):
+    return list(difflib.unified_diff(format_grammar(before), format_grammar(after), "before", "after", lineterm=""))
+
+# === Useless symbols ===
+def remove_useless(productions, start_symbol=None):
+    # Drops nonterminals that derive no terminal string, then those unreachable from the start
+    start_symbol = start_symbol or next(iter(productions))
+    prods = [(lhs, _rhs(rhs)) for lhs, rhs_list in productions.items() for rhs in rhs_list]
+    remaining = []
+    waiting = {nt: [] for nt in productions}
+    generating = set()
+    work = []
+    for p, (lhs, rhs) in enumerate(prods):
+        pending = {sym for sym in rhs if sym in productions}
+        remaining.append(len(pending))
+        for sym in pending:
+            waiting[sym].append(p)
+        if not pending and lhs not in generating:
+            generating.add(lhs)
+            work.append(lhs)
+    while work:
+        for p in waiting[work.pop()]:
+            remaining[p] -= 1
+            lhs = prods[p][0]
+            if remaining[p] == 0 and lhs not in generating:
+                generating.add(lhs)
+                work.append(lhs)
+    if start_symbol not in generating:
+        raise ValueError(f"Start symbol {start_symbol} derives no terminal string")
+
+    reachable = {start_symbol}
+    work = [start_symbol]
+    while work:
+        for rhs in productions[work.pop()]:
+            if all(sym not in productions or sym in generating for sym in rhs):
+                for sym in rhs:
+                    if sym in productions and sym not in reachable:
+                        reachable.add(sym)
+                        work.append(sym)
+
+    result = {}
+    changes = []
+    for nt, rhs_list in productions.items():
+        if nt not in generating:
+            changes.append(("useless", f"removed {nt}: derives no terminal string"))
+        elif nt not in reachable:
+            changes.append(("useless", f"removed {nt}: unreachable from {start_symbol}"))
+        else:
+            kept = result[nt] = []
+            for rhs in rhs_list:
+                if all(sym not in productions or sym in generating for sym in rhs):
+                    kept.append(rhs)
+                else:
+                    changes.append(("useless", f"removed {format_production(nt, _rhs(rhs))}"))
+    return result, changes
+
+# === Left recursion ===
+def nullable_symbols(productions):
+    # Counting worklist, linear in the grammar (GrammarAnalysis would also build FIRST/FOLLOW)
+    remaining = []
+    waiting = {nt: [] for nt in productions}
+    lhs_of = []
+    nullable = set()
+    work = []
+    for lhs, rhs_list in productions.items():
+        for rhs in rhs_list:
+            rhs = _rhs(rhs)
+            p = len(lhs_of)
+            lhs_of.append(lhs)
+            remaining.append(len(rhs) if all(sym in productions for sym in rhs) else -1)
+            if remaining[p] > 0:
+                for sym in rhs:
+                    waiting[sym].append(p)
+            elif remaining[p] == 0 and lhs not in nullable:
+                nullable.add(lhs)
+                work.append(lhs)
+    while work:
+        for p in waiting[work.pop()]:
+            remaining[p] -= 1
+            if remaining[p] == 0 and lhs_of[p] not in nullable:
+                nullable.add(lhs_of[p])
+                work.append(lhs_of[p])
+    return nullable
+
+def _left_corner_sccs(productions, nullable):
+    # Strongly connected components of "A -> B ..." where every symbol before B is nullable (iterative Tarjan)
+    edges = {}
+    for nt, rhs_list in productions.items():
+        targets = edges[nt] = []
+        for rhs in rhs_list:
+            for sym in _rhs(rhs):
+                if sym in productions:
+                    targets.append(sym)
+                if sym not in nullable:
+                    break
+    index, low, on_stack = {}, {}, set()
+    stack, components = [], []
+    for root in productions:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(edges[root]))]
+        while work:
+            v, children = work[-1]
+            for w in children:
+                if w not in index:
+                    index[w] = low[w] = len(index)
+                    stack.append(w)
+                    on_stack.add(w)
+                    work.append((w, iter(edges[w])))
+                    break
+                if w in on_stack:
+                    low[v] = min(low[v], index[w])
+            else:
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[v])
+                if low[v] == index[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack.discard(w)
+                        component.append(w)
+                        if w == v:
+                            break
+                    components.append(component)
+    return components, edges
+
+def _eliminate_direct(nt, rhs_list, taken, changes):
+    recursive = [rhs[1:] for rhs in rhs_list if rhs and rhs[0] == nt]
+    if not recursive:
+        return {nt: rhs_list}
+    others = [rhs for rhs in rhs_list if not rhs or rhs[0] != nt]
+    if not others:
+        raise ValueError(f"{nt} is left-recursive with no other alternative")
+    tails = [tail for tail in recursive if tail]
+    if len(tails) < len(recursive):
+        changes.append(("left_recursion", f"removed {nt} -> {nt}"))
+    if not tails:
+        return {nt: others}
+    new = fresh_name(nt, taken)
+    changes.append(("left_recursion", f"{nt}: moved {len(tails)} left-recursive alternatives into {new}"))
+    return {nt: [rhs + [new] for rhs in others], new: [tail + [new] for tail in tails] + [[]]}
+
+def eliminate_left_recursion(productions):
+    # Paull's algorithm, applied only to left-recursive strongly connected components
+    grammar = {nt: [_rhs(rhs) for rhs in rhs_list] for nt, rhs_list in productions.items()}
+    nullable = nullable_symbols(grammar)
+    components, edges = _left_corner_sccs(grammar, nullable)
+    taken = set(grammar)
+    for rhs_list in grammar.values():
+        for rhs in rhs_list:
+            taken.update(rhs)
+    changes = []
+    added = {}
+    position = {nt: i for i, nt in enumerate(grammar)}
+    for component in components:
+        if len(component) == 1 and component[0] not in edges[component[0]]:
+            continue
+        members = sorted(component, key=position.__getitem__)
+        done = set()
+        for nt in members:
+            rhs_list = grammar[nt]
+            for earlier in members:
+                if earlier not in done:
+                    continue
+                if any(rhs and rhs[0] == earlier for rhs in rhs_list):
+                    changes.append(("left_recursion", f"{nt}: substituted {earlier} at the left edge"))
+                    rhs_list = [new for rhs in rhs_list
+                                for new in ([alt + rhs[1:] for alt in grammar[earlier]]
+                                            if rhs and rhs[0] == earlier else [rhs])]
+            rewritten = _eliminate_direct(nt, rhs_list, taken, changes)
+            grammar[nt] = rewritten.pop(nt)
+            added[nt] = rewritten
+            done.add(nt)
+    result = {}
+    for nt, rhs_list in grammar.items():
+        result[nt] = [_out(rhs) for rhs in rhs_list]
+        for new, new_list in added.get(nt, {}).items():
+            result[new] = [_out(rhs) for rhs in new_list]
+    # Paull only removes recursion at the very left edge; recursion behind a nullable prefix,
+    # whether in the input or created by a nullable tail in "A' -> tail A'", is checked on the output
+    components, edges = _left_corner_sccs(result, nullable_symbols(result))
+    position = {nt: i for i, nt in enumerate(result)}
+    for component in components:
+        if len(component) > 1 or component[0] in edges[component[0]]:
+            members = ", ".join(sorted(component, key=position.__getitem__))
+            changes.append(("left_recursion", f"warning: {members} left-recursive through a nullable prefix, "
+                                              f"which is not rewritten"))
+    return result, changes
+
+# === Left factoring ===
+def left_factor(productions):
+    # Builds a trie of each nonterminal's alternatives; every branching trie node becomes a new nonterminal
+    taken = set(productions)
+    for rhs_list in productions.values():
+        for rhs in rhs_list:
+            taken.update(rhs)
+    result = {}
+    changes = []
+    for nt, rhs_list in productions.items():
+        root = {}
+        for rhs in rhs_list:
+            node = root
+            for sym in _rhs(rhs):
+                node = node.setdefault(sym, {})
+            node[None] = True
+        if len(root) == len(rhs_list):
+            # No two alternatives share a first symbol (and none repeat): nothing to factor
+            result[nt] = [list(rhs) for rhs in rhs_list]
+            continue
+        work = [(nt, root)]
+        for name, node in work:
+            alternatives = []
+            for sym, child in node.items():
+                if sym is None:
+                    alternatives.append([EPSILON])
+                    continue
+                path = [sym]
+                while len(child) == 1 and None not in child:
+                    (sym, child), = child.items()
+                    path.append(sym)
+                if len(child) == 1:
+                    alternatives.append(path)
+                else:
+                    new = fresh_name(nt, taken)
+                    changes.append(("left_factor", f"{name}: factored out {' '.join(path)} into {new}"))
+                    alternatives.append(path + [new])
+                    work.append((new, child))
+            result[name] = alternatives
+    return result, changes
+
+PASSES = {
+    "useless": remove_useless,
+    "left_recursion": eliminate_left_recursion,
+    "left_factor": left_factor,
+}
+
+DEFAULT_PIPELINE = ("useless", "left_recursion", "left_factor")
+
+def transform(productions, start_symbol=None, pipeline=DEFAULT_PIPELINE):
+    # Returns (grammar, changes); the start symbol stays the first key
+    changes = []
+    for name in pipeline:
+        if name == "useless":
+            productions, step = remove_useless(productions, start_symbol)
+        else:
+            productions, step = PASSES[name](productions)
+        changes.extend(step)
+    return productions, changes
+
+def prepare_ll1(productions, start_symbol=None, pipeline=DEFAULT_PIPELINE):
+    # Transforms the grammar and builds its LL(1) table; returns (parser, changes, diff).
+    # parser.conflicts lists whatever the transformations could not make LL(1).
+    from ll1 import LL1Parser
+
+    grammar, changes = transform(productions, start_symbol, pipeline)
+    terminals = {sym for rhs_list in grammar.values() for rhs in rhs_list for sym in rhs
+                 if sym not in grammar and sym != EPSILON}
+    parser = LL1Parser(grammar, terminals)
+    parser.construct_parse_table()
+    return parser, changes, diff_grammars(productions, grammar)
+
+def print_report(changes, diff, conflicts=()):
+    for name, description in changes:
+        print(f"  [{name}] {description}")
+    for line in diff:
+        print(line)
+    for nt, terminal, existing, new in conflicts:
+        print(f"  conflict at {nt}, {terminal!r}: {existing} / {new}")
+
+if __name__ == "__main__":
+    from ada import tokenize
+    from lr_parser import ada_grammar
+
+    parser, changes, diff = prepare_ll1(ada_grammar)
+    print_report(changes, diff, parser.conflicts)
+    if not parser.conflicts:
+        kinds = [token.kind for token in tokenize("x := 5 + 3; y := (x - 1) * 2;")]
+        print(f"\nParsed {parser.parse(kinds)} tokens with the LL(1) table")
+    sys.exit(1 if parser.conflicts else 0)
@@ -0,0 +1,152 @@
+# Incremental front end for Ada assignment statements.
+#
+# Statements end at ';', and no token can contain one, so the text splits into chunks
+# that each end just after a ';' (the last chunk may not). Each chunk keeps its tokens,
+# AST node and TAC. An edit only relexes and reparses the chunks it touches; chunks whose
+# text is unchanged keep their node and TAC. Chunks are held in blocks of about BLOCK_SIZE
+# with a character count per block, so finding the chunks of an edit walks the blocks
+# once instead of re-indexing every statement.
+
+from ada import AdaParser, lexer
+from ir import IRProgram, lower
+
+BLOCK_SIZE = 128
+
+class Statement:
+    # tokens have line/column relative to the chunk; node is None when error is set
+    __slots__ = ("text", "tokens", "node", "tac", "error")
+
+    def __init__(self, text, tokens, node, tac, error):
+        self.text = text
+        self.tokens = tokens
+        self.node = node
+        self.tac = tac
+        self.error = error
+
+def split_chunks(text):
+    pieces = text.split(";")
+    chunks = [piece + ";" for piece in pieces[:-1]]
+    if pieces[-1]:
+        chunks.append(pieces[-1])
+    return chunks
+
+class IncrementalDocument:
+    def __init__(self, text=""):
+        self.text = ""
+        self.blocks = []
+        self.block_chars = []
+        # Scratch program for lowering, cleared after each statement: TAC does not depend on position
+        # and names and constants of replaced statements are not kept
+        self._program = IRProgram()
+        self.stats = {"edits": 0, "relexed_chars": 0, "reparsed": 0, "reused": 0}
+        if text:
+            self.edit(0, 0, text)
+
+    def _build(self, text):
+        self.stats["reparsed"] += 1
+        self.stats["relexed_chars"] += len(text)
+        try:
+            tokens = list(lexer.tokenize(text))
+        except SyntaxError as e:
+            return Statement(text, [], None, [], str(e))
+        if not tokens:
+            return Statement(text, tokens, None, [], None)
+        parser = AdaParser(tokens)
+        try:
+            node = parser.parse_assignment()
+        except SyntaxError as e:
+            return Statement(text, tokens, None, [], str(e))
+        if parser.pos != len(tokens):
+            return Statement(text, tokens, None, [], "Missing semicolon")
+        program = self._program
+        lower(program, [node])
+        tac = program.lines()
+        program.clear()
+        return Statement(text, tokens, node, tac, None)
+
+    def _locate(self, offset):
+        # (block index, chunk index, chunk start) of the chunk holding offset; the last chunk for offset == len(text)
+        position = 0
+        last = len(self.blocks) - 1
+        for b, chars in enumerate(self.block_chars):
+            if offset < position + chars or b == last:
+                block = self.blocks[b]
+                for c, chunk in enumerate(block):
+                    if offset < position + len(chunk.text) or c == len(block) - 1:
+                        return b, c, position
+                    position += len(chunk.text)
+            position += chars
+        return None
+
+    def edit(self, start, end, new_text):
+        # Replaces text[start:end] with new_text; returns the number of statements rebuilt
+        if not 0 <= start <= end <= len(self.text):
+            raise ValueError(f"Edit range {start}:{end} outside the document (length {len(self.text)})")
+        self.stats["edits"] += 1
+        self.text = self.text[:start] + new_text + self.text[end:]
+        if not self.blocks:
+            old_chunks, first_block, last_block, region_start = [], 0, -1, 0
+            before, after = [], []
+        else:
+            b1, c1, region_start = self._locate(start)
+            b2, c2, _ = self._locate(max(start, end - 1))
+            first_block, last_block = b1, b2
+            flat = [chunk for block in self.blocks[b1:b2 + 1] for chunk in block]
+            c2 += sum(len(block) for block in self.blocks[b1:b2])
+            before, old_chunks, after = flat[:c1], flat[c1:c2 + 1], flat[c2 + 1:]
+        old_text = "".join(chunk.text for chunk in old_chunks)
+        region = old_text[:start - region_start] + new_text + old_text[end - region_start:]
+        # A removed ';' joins the region with the statement after it
+        while not region.endswith(";") and (after or last_block + 1 < len(self.blocks)):
+            if not after:
+                last_block += 1
+                after = list(self.blocks[last_block])
+            old_chunks.append(after.pop(0))
+            region += old_chunks[-1].text
+        reusable = {chunk.text: chunk for chunk in old_chunks}
+        rebuilt = 0
+        new_chunks = []
+        for text in split_chunks(region):
+            chunk = reusable.get(text)
+            if chunk is None:
+                chunk = self._build(text)
+                rebuilt += 1
+            else:
+                self.stats["reused"] += 1
+            new_chunks.append(chunk)
+        chunks = before + new_chunks + after
+        n_blocks = len(chunks) // BLOCK_SIZE or (1 if chunks else 0)
+        size = -(-len(chunks) // n_blocks) if n_blocks else 0
+        blocks = [chunks[i:i + size] for i in range(0, len(chunks), size)] if n_blocks else []
+        self.blocks[first_block:last_block + 1] = blocks
+        self.block_chars[first_block:last_block + 1] = [sum(len(chunk.text) for chunk in block) for block in blocks]
+        return rebuilt
+
+    def chunks(self):
+        for block in self.blocks:
+            yield from block
+
+    def statements(self):
+        return [chunk.node for chunk in self.chunks() if chunk.node is not None]
+
+    def errors(self):
+        # (offset of the chunk, message) for every statement that failed to lex or parse
+        offset = 0
+        result = []
+        for chunk in self.chunks():
+            if chunk.error is not None:
+                result.append((offset, chunk.error))
+            offset += len(chunk.text)
+        return result
+
+    def tac_lines(self):
+        return [line for chunk in self.chunks() for line in chunk.tac]
+
+if __name__ == "__main__":
+    source = "x := 5 + 3;\ny := (x - 1) * 2;\nz := y / 4;\n"
+    doc = IncrementalDocument(source)
+    print("\n".join(doc.tac_lines()))
+    at = source.index("(x - 1)")
+    rebuilt = doc.edit(at + 1, at + 2, "z")
+    print(f"\nAfter editing statement 2 ({rebuilt} of {len(doc.statements())} statements rebuilt):")
+    print("\n".join(doc.tac_lines()))
@@ -0,0 +1,116 @@
+import cProfile
+import json
+import pstats
+import time
+import tracemalloc
+
+class _NullPhase:
+    # Shared by every phase of a disabled Instrumentation: entering it costs one method call
+    __slots__ = ()
+    enabled = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, key, n):
+        pass
+
+NULL_PHASE = _NullPhase()
+
+class Phase:
+    __slots__ = ("owner", "name", "counts", "seconds", "peak_bytes", "profile", "_started", "_profiler")
+    enabled = True
+
+    def __init__(self, owner, name):
+        self.owner = owner
+        self.name = name
+        self.counts = {}
+        self.seconds = 0.0
+        self.peak_bytes = None
+        self.profile = None
+        self._profiler = None
+
+    def count(self, key, n):
+        self.counts[key] = self.counts.get(key, 0) + n
+
+    def __enter__(self):
+        if self.owner.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self.peak_bytes = tracemalloc.get_traced_memory()[0]
+        if self.owner.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self._started
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.profile = top_functions(self._profiler, self.owner.profile_limit)
+            self._profiler = None
+        if self.owner.memory:
+            # Peak allocated above what was live when the phase started
+            self.peak_bytes = tracemalloc.get_traced_memory()[1] - self.peak_bytes
+        self.owner.phases.append(self)
+        return False
+
+    def as_dict(self):
+        result = {"name": self.name, "seconds": self.seconds, "counts": self.counts}
+        if self.peak_bytes is not None:
+            result["peak_bytes"] = self.peak_bytes
+        if self.profile is not None:
+            result["profile"] = self.profile
+        return result
+
+def top_functions(profiler, limit):
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [{"function": f"{filename}:{line}({function})", "calls": calls,
+             "own_seconds": own, "cumulative_seconds": cumulative}
+            for (filename, line, function), (_, calls, own, cumulative, _) in rows]
+
+class Instrumentation:
+    # Records wall time and counts per phase; memory adds tracemalloc peaks, profile adds cProfile
+    def __init__(self, name="<string>", enabled=True, memory=False, profile=False, profile_limit=15):
+        self.name = name
+        self.enabled = enabled
+        self.memory = memory
+        self.profile = profile
+        self.profile_limit = profile_limit
+        self.phases = []
+        self._owns_tracing = memory and enabled and not tracemalloc.is_tracing()
+
+    def phase(self, name):
+        return Phase(self, name) if self.enabled else NULL_PHASE
+
+    def close(self):
+        # Stops tracemalloc if this instrumentation was the one that started it
+        if self._owns_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._owns_tracing = False
+
+    def report(self):
+        return {"name": self.name,
+                "total_seconds": sum(phase.seconds for phase in self.phases),
+                "phases": [phase.as_dict() for phase in self.phases]}
+
+    def to_json(self, path=None):
+        text = json.dumps(self.report(), indent=2)
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        return text
+
+    def print_summary(self):
+        for phase in self.phases:
+            counts = ", ".join(f"{key} {value}" for key, value in phase.counts.items())
+            memory = f"  peak {phase.peak_bytes / 1024:8.1f} KB" if phase.peak_bytes is not None else ""
+            print(f"{phase.name:<10} {phase.seconds * 1000:9.3f} ms{memory}  {counts}")
+
+DISABLED = Instrumentation(enabled=False)
@@ -0,0 +1,163 @@
+# Quadruple IR for mini_compiler.py.
+# Operands are integer refs: index << 2 | kind, where the index points into the
+# program's constant pool, variable table or temporary numbering. Temporaries are
+# SSA: each one is defined by exactly one quad.
+
+import operator
+
+from ast_nodes import BinOp, Num
+
+CONST, VAR, TEMP = 0, 1, 2
+
+# Comparisons yield 1 or 0
+COMPARISONS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+               '==': operator.eq, '!=': operator.ne}
+
+BINARY_OPS = ('+', '-', '*', '/', '%') + tuple(COMPARISONS)
+
+def evaluate(op, x, y):
+    if op == '+':
+        return x + y
+    if op == '-':
+        return x - y
+    if op == '*':
+        return x * y
+    if op == '/' or op == '%':
+        # Integer division truncating toward zero, matching the 'int' type of every variable;
+        # the remainder takes the sign of the dividend
+        q = abs(x) // abs(y)
+        q = q if (x < 0) == (y < 0) else -q
+        return q if op == '/' else x - y * q
+    return int(COMPARISONS[op](x, y))
+
+def kind_of(ref):
+    return ref & 3
+
+def index_of(ref):
+    return ref >> 2
+
+def make_ref(kind, index):
+    return index << 2 | kind
+
+class Quad:
+    # op is 'copy' (dst = a) or one of BINARY_OPS (dst = a op b)
+    __slots__ = ("op", "dst", "a", "b")
+
+    def __init__(self, op, dst, a, b=None):
+        self.op = op
+        self.dst = dst
+        self.a = a
+        self.b = b
+
+    def __repr__(self):
+        return f"Quad({self.op!r}, {self.dst}, {self.a}, {self.b})"
+
+class IRProgram:
+    def __init__(self, symbols=None):
+        # Sharing a SymbolTable's interning makes variable indices equal symbol ids
+        self.symbols = symbols
+        self.names = [] if symbols is None else symbols.names
+        self.name_id = {} if symbols is None else symbols.ids
+        if symbols is not None:
+            self._intern = symbols.intern
+        self.consts = []
+        self.const_id = {}
+        self.n_temps = 0
+        self.code = []
+
+    def var(self, name):
+        i = self.name_id.get(name)
+        if i is None:
+            i = self._intern(name)
+        return make_ref(VAR, i)
+
+    def var_ref(self, name, sym):
+        # sym is name's id in a SymbolTable; it is the variable index when this program shares that table
+        return make_ref(VAR, sym) if sym is not None and self.symbols is not None else self.var(name)
+
+    def _intern(self, name):
+        i = self.name_id[name] = len(self.names)
+        self.names.append(name)
+        return i
+
+    def const(self, value):
+        i = self.const_id.get(value)
+        if i is None:
+            i = self.const_id[value] = len(self.consts)
+            self.consts.append(value)
+        return make_ref(CONST, i)
+
+    def const_ref(self, value):
+        # Ref of an already pooled constant, or None; never grows the pool
+        i = self.const_id.get(value)
+        return None if i is None else make_ref(CONST, i)
+
+    def clear(self):
+        # Drops the code, temps and constant pool, and the names unless they belong to a SymbolTable
+        self.code.clear()
+        self.n_temps = 0
+        self.consts.clear()
+        self.const_id.clear()
+        if self.symbols is None:
+            self.names.clear()
+            self.name_id.clear()
+
+    def new_temp(self):
+        self.n_temps += 1
+        return make_ref(TEMP, self.n_temps - 1)
+
+    def emit(self, op, dst, a, b=None):
+        self.code.append(Quad(op, dst, a, b))
+        return dst
+
+    def value_of(self, ref):
+        # Constant value of a CONST ref
+        return self.consts[ref >> 2]
+
+    def operand_text(self, ref):
+        kind = ref & 3
+        if kind == CONST:
+            return str(self.consts[ref >> 2])
+        if kind == VAR:
+            return self.names[ref >> 2]
+        return f"t{(ref >> 2) + 1}"
+
+    def format(self, quad):
+        text = self.operand_text
+        if quad.op == 'copy':
+            return f"{text(quad.dst)} = {text(quad.a)}"
+        return f"{text(quad.dst)} = {text(quad.a)} {quad.op} {text(quad.b)}"
+
+    def lines(self):
+        return [self.format(quad) for quad in self.code]
+
+def lower(program, statements):
+    # Lowers Assign nodes to quads with a post-order walk on an explicit stack
+    for statement in statements:
+        value = statement.value
+        if isinstance(value, BinOp):
+            result = lower_expression(program, value)
+        else:
+            result = leaf_ref(program, value)
+        program.emit('copy', program.var_ref(statement.target, statement.sym), result)
+    return program
+
+def leaf_ref(program, node):
+    return program.const(node.value) if isinstance(node, Num) else program.var_ref(node.id, node.sym)
+
+def lower_expression(program, node):
+    results = []
+    stack = [(node, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if not isinstance(node, BinOp):
+            results.append(leaf_ref(program, node))
+        elif expanded:
+            b = results.pop()
+            a = results.pop()
+            results.append(program.emit(node.op, program.new_temp(), a, b))
+        else:
+            stack.append((node, True))
+            stack.append((node.right, False))
+            stack.append((node.left, False))
+    return results[0]
@@ -0,0 +1,55 @@
+import mmap
+import re
+from collections import namedtuple
+
+Token = namedtuple("Token", "kind value line column")
+
+class LexError(SyntaxError):
+    pass
+
+class Lexer:
+    # spec is a sequence of (kind, regex) pairs tried in order; kinds in skip are matched but not emitted
+    def __init__(self, spec, skip=("SKIP", "NEWLINE")):
+        self.spec = tuple(spec)
+        self.skip = frozenset(skip)
+        source = "|".join(f"(?P<{kind}>{pattern})" for kind, pattern in self.spec)
+        # ASCII classes for str too, so \w, \d and \s match the same characters in str and bytes input
+        self.pattern = re.compile(source, re.ASCII)
+        self.bytes_pattern = re.compile(source.encode("utf-8"))
+
+    def tokenize(self, source):
+        # source may be str, bytes or an mmap; bytes are matched in place and only token values are decoded
+        if isinstance(source, str):
+            match, newline, decode = self.pattern.match, "\n", None
+        else:
+            match, newline, decode = self.bytes_pattern.match, b"\n", bytes.decode
+        find = source.find
+        skip = self.skip
+        pos, end_of_input = 0, len(source)
+        line, line_start = 1, 0
+        while pos < end_of_input:
+            m = match(source, pos)
+            if m is None or m.end() == pos:
+                bad = source[pos:pos + 1]
+                if decode is not None:
+                    # The whole UTF-8 character, so the message matches the one for str input
+                    bad = bytes(source[pos:pos + 4]).decode("utf-8", "replace")[:1]
+                raise LexError(f"Invalid character {bad!r} at line {line}, column {pos - line_start + 1}")
+            end = m.end()
+            kind = m.lastgroup
+            if kind not in skip:
+                value = m.group()
+                yield Token(kind, value if decode is None else decode(value), line, pos - line_start + 1)
+            if find(newline, pos, end) >= 0:
+                line += m.group().count(newline)
+                line_start = source.rfind(newline, pos, end) + 1
+            pos = end
+
+    def tokenize_file(self, path):
+        with open(path, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                return
+        with mm:
+            yield from self.tokenize(mm)
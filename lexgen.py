@@ -0,0 +1,544 @@
+# Lexer generator: flex-style rules -> Thompson NFA -> DFA -> minimal DFA -> flat tables.
+#
+# Patterns are parsed into character sets over code-point intervals. The interval
+# boundaries of every set split the code-point space into segments; the NFA and DFA
+# move on segment ids, and identical DFA columns are merged at the end, so the
+# scanner only maps a character to a small class number and indexes one table.
+# Matching is longest-match; on equal length the earlier rule wins, as in flex.
+
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_right
+
+from lexer import LexError, Token
+
+MAX_CHAR = 0x10FFFF
+DEAD = -1
+
+# === Patterns ===
+# \d, \w and \s are the ASCII classes, as in lexer.Lexer
+DIGITS = ((48, 57),)
+WORD = ((48, 57), (65, 90), (95, 95), (97, 122))
+SPACE = ((9, 13), (32, 32))
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'f': '\f', 'v': '\v', 'a': '\a', 'b': '\b', '0': '\0'}
+
+def normalize(intervals):
+    merged = []
+    for lo, hi in sorted(intervals):
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+        else:
+            merged.append((lo, hi))
+    return tuple(merged)
+
+def complement(intervals):
+    result, next_lo = [], 0
+    for lo, hi in normalize(intervals):
+        if lo > next_lo:
+            result.append((next_lo, lo - 1))
+        next_lo = hi + 1
+    if next_lo <= MAX_CHAR:
+        result.append((next_lo, MAX_CHAR))
+    return tuple(result)
+
+CLASS_ESCAPES = {'d': DIGITS, 'w': WORD, 's': SPACE,
+                 'D': complement(DIGITS), 'W': complement(WORD), 'S': complement(SPACE)}
+
+class PatternParser:
+    # Pattern AST: ("set", intervals) | ("cat", [nodes]) | ("alt", [nodes]) | ("star"/"plus"/"opt", node)
+    # flex=True adds "quoted strings" and {NAME} definitions; \d \w \s work in both dialects
+    def __init__(self, pattern, definitions=None, flex=True):
+        self.pattern = pattern
+        self.pos = 0
+        self.definitions = definitions or {}
+        self.flex = flex
+
+    def error(self, message):
+        raise ValueError(f"{message} at offset {self.pos} in pattern {self.pattern!r}")
+
+    def peek(self):
+        return self.pattern[self.pos] if self.pos < len(self.pattern) else None
+
+    def parse(self):
+        node = self.parse_alternation()
+        if self.pos != len(self.pattern):
+            self.error("Unexpected " + repr(self.peek()))
+        return node
+
+    def parse_alternation(self):
+        branches = [self.parse_concatenation()]
+        while self.peek() == '|':
+            self.pos += 1
+            branches.append(self.parse_concatenation())
+        return branches[0] if len(branches) == 1 else ("alt", branches)
+
+    def parse_concatenation(self):
+        items = []
+        while self.peek() is not None and self.peek() not in '|)':
+            items.append(self.parse_repeat())
+        return items[0] if len(items) == 1 else ("cat", items)
+
+    def parse_repeat(self):
+        node = self.parse_atom()
+        while True:
+            c = self.peek()
+            if c == '*':
+                node = ("star", node)
+            elif c == '+':
+                node = ("plus", node)
+            elif c == '?':
+                node = ("opt", node)
+            elif c == '{' and re.match(r"\{\d+(,\d*)?\}", self.pattern[self.pos:]):
+                m = re.match(r"\{(\d+)(,(\d*))?\}", self.pattern[self.pos:])
+                low = int(m.group(1))
+                high = low if m.group(2) is None else (int(m.group(3)) if m.group(3) else None)
+                node = repeat(node, low, high)
+                self.pos += m.end() - 1
+            else:
+                return node
+            self.pos += 1
+
+    def parse_atom(self):
+        c = self.peek()
+        if c is None:
+            self.error("Missing operand")
+        if c == '(':
+            self.pos += 1
+            node = self.parse_alternation() if self.peek() != ')' else ("cat", [])
+            if self.peek() != ')':
+                self.error("Missing ')'")
+            self.pos += 1
+            return node
+        if c == '[':
+            return self.parse_class()
+        if c == '.':
+            self.pos += 1
+            return ("set", complement(((10, 10),)))
+        if c == '\\':
+            return self.parse_escape(in_class=False)
+        if c == '"' and self.flex:
+            end = self.pos + 1
+            chars = []
+            while end < len(self.pattern) and self.pattern[end] != '"':
+                if self.pattern[end] == '\\' and end + 1 < len(self.pattern):
+                    end += 1
+                    chars.append(ESCAPES.get(self.pattern[end], self.pattern[end]))
+                else:
+                    chars.append(self.pattern[end])
+                end += 1
+            if end >= len(self.pattern):
+                self.error("Unterminated string")
+            self.pos = end + 1
+            return literal("".join(chars))
+        if c == '{' and self.flex:
+            m = re.match(r"\{([A-Za-z_]\w*)\}", self.pattern[self.pos:])
+            if m is None or m.group(1) not in self.definitions:
+                self.error("Unknown definition")
+            self.pos += m.end()
+            return self.definitions[m.group(1)]
+        if c in '*+?|)':
+            self.error("Unexpected " + repr(c))
+        if c in '^$' or c == '/' and self.flex:
+            self.error("Anchors and trailing context are not supported")
+        self.pos += 1
+        return ("set", ((ord(c), ord(c)),))
+
+    def parse_escape(self, in_class):
+        self.pos += 1
+        c = self.peek()
+        if c is None:
+            self.error("Trailing backslash")
+        self.pos += 1
+        if c in CLASS_ESCAPES:
+            intervals = CLASS_ESCAPES[c]
+        elif c == 'x' and re.match(r"[0-9a-fA-F]{2}", self.pattern[self.pos:self.pos + 2]):
+            code = int(self.pattern[self.pos:self.pos + 2], 16)
+            self.pos += 2
+            intervals = ((code, code),)
+        elif c in '01234567' and re.match(r"[0-7]{2}", self.pattern[self.pos:self.pos + 2]):
+            code = int(self.pattern[self.pos - 1:self.pos + 2], 8)
+            self.pos += 2
+            intervals = ((code, code),)
+        else:
+            code = ord(ESCAPES.get(c, c))
+            intervals = ((code, code),)
+        return intervals if in_class else ("set", intervals)
+
+    def parse_class(self):
+        self.pos += 1
+        negate = self.peek() == '^'
+        if negate:
+            self.pos += 1
+        intervals = []
+        first = True
+        while True:
+            c = self.peek()
+            if c is None:
+                self.error("Unterminated character class")
+            if c == ']' and not first:
+                self.pos += 1
+                break
+            first = False
+            if c == '\\':
+                part = self.parse_escape(in_class=True)
+            else:
+                self.pos += 1
+                part = ((ord(c), ord(c)),)
+            nxt = self.pattern[self.pos:self.pos + 2]
+            if len(part) == 1 and part[0][0] == part[0][1] and nxt[:1] == '-' and nxt[1:] not in ('', ']'):
+                self.pos += 1
+                high = self.parse_escape(in_class=True) if self.peek() == '\\' else None
+                if high is None:
+                    high = ((ord(self.peek()), ord(self.peek())),)
+                    self.pos += 1
+                if high[0][0] < part[0][0]:
+                    self.error("Bad character range")
+                part = ((part[0][0], high[0][0]),)
+            intervals.extend(part)
+        return ("set", complement(intervals) if negate else normalize(intervals))
+
+def literal(text):
+    return ("cat", [("set", ((ord(c), ord(c)),)) for c in text])
+
+def repeat(node, low, high):
+    items = [node] * low
+    if high is None:
+        items.append(("star", node))
+    else:
+        items.extend([("opt", node)] * (high - low))
+    return ("cat", items)
+
+def parse_pattern(pattern, definitions=None, flex=True):
+    return PatternParser(pattern, definitions, flex).parse()
+
+# === .l files ===
+def split_pattern(line):
+    # The pattern ends at the first whitespace outside quotes and brackets
+    i, quoted, bracket = 0, False, False
+    while i < len(line):
+        c = line[i]
+        if c == '\\':
+            i += 2
+            continue
+        if quoted:
+            quoted = c != '"'
+        elif bracket:
+            bracket = c != ']' or line[i - 1] == '['
+        elif c == '"':
+            quoted = True
+        elif c == '[':
+            bracket = True
+            if line[i + 1:i + 2] == '^':
+                i += 1
+        elif c in ' \t':
+            break
+        i += 1
+    return line[:i], line[i:].strip()
+
+def rule_name(action, index):
+    # "return NAME;" names the token; otherwise an identifier-like string literal in the action,
+    # or an upper-case word inside one ("%s is an OCTAL number" -> OCTAL)
+    m = (re.search(r"\breturn\s+([A-Za-z_]\w*)\s*;", action) or re.search(r'"([A-Za-z_]\w*)"', action)
+         or re.search(r'"[^"]*?\b([A-Z][A-Z_]+)\b[^"]*"', action))
+    return m.group(1) if m else f"rule{index}"
+
+def is_skip(action):
+    # Actions that do nothing: "{}", ";", comments only
+    code = re.sub(r"/\*.*?\*/|//[^\n]*", "", action, flags=re.S)
+    return code.replace("{", "").replace("}", "").replace(";", "").strip() == ""
+
+def parse_lex_file(text):
+    # Returns (rules, skip) in the form Lexer takes: [(name, pattern AST)], names to drop
+    sections = re.split(r"^%%[ \t]*$", text, flags=re.M)
+    if len(sections) < 2:
+        raise ValueError("No rules section (missing %%)")
+    definitions = {}
+    for line in re.sub(r"^%\{.*?^%\}", "", sections[0], flags=re.M | re.S).splitlines():
+        m = re.match(r"([A-Za-z_]\w*)\s+(\S.*)$", line)
+        if m:
+            definitions[m.group(1)] = parse_pattern(m.group(2).strip(), definitions)
+    lines = re.sub(r"^%\{.*?^%\}", "", sections[1], flags=re.M | re.S).splitlines()
+    raw = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        i += 1
+        if not line.strip() or line[0] in ' \t' or line.lstrip().startswith("/*"):
+            continue
+        pattern, action = split_pattern(line)
+        while action.count("{") > action.count("}") and i < len(lines):
+            action += "\n" + lines[i]
+            i += 1
+        raw.append((pattern, action))
+    rules, skip = [], []
+    pending = []
+    for index, (pattern, action) in enumerate(raw):
+        pending.append(pattern)
+        if action == "|":
+            continue
+        name = rule_name(action, index)
+        if is_skip(action):
+            name = f"skip{index}"
+            skip.append(name)
+        node = ("alt", [parse_pattern(p, definitions) for p in pending]) if len(pending) > 1 else parse_pattern(pattern, definitions)
+        rules.append((name, node))
+        pending = []
+    return rules, skip
+
+# === NFA and DFA ===
+def collect_sets(node, out):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node[0] == "set":
+            out.append(node[1])
+        elif node[0] in ("cat", "alt"):
+            stack.extend(node[1])
+        else:
+            stack.append(node[1])
+
+class NFA:
+    def __init__(self):
+        self.eps = []
+        self.moves = []
+        self.accept = {}
+
+    def state(self):
+        self.eps.append([])
+        self.moves.append([])
+        return len(self.eps) - 1
+
+    def build(self, node, segments_of):
+        # Thompson construction; returns (start, end)
+        kind = node[0]
+        if kind == "set":
+            start, end = self.state(), self.state()
+            self.moves[start].append((segments_of(node[1]), end))
+        elif kind == "cat":
+            start = end = self.state()
+            for item in node[1]:
+                s, e = self.build(item, segments_of)
+                self.eps[end].append(s)
+                end = e
+        elif kind == "alt":
+            start, end = self.state(), self.state()
+            for item in node[1]:
+                s, e = self.build(item, segments_of)
+                self.eps[start].append(s)
+                self.eps[e].append(end)
+        else:
+            s, e = self.build(node[1], segments_of)
+            start, end = self.state(), self.state()
+            self.eps[start].append(s)
+            self.eps[e].append(end)
+            if kind in ("star", "opt"):
+                self.eps[start].append(end)
+            if kind in ("star", "plus"):
+                self.eps[e].append(s)
+        return start, end
+
+    def closure(self, states):
+        result = set(states)
+        stack = list(states)
+        while stack:
+            for t in self.eps[stack.pop()]:
+                if t not in result:
+                    result.add(t)
+                    stack.append(t)
+        return frozenset(result)
+
+def subset_construction(nfa, start, n_segments):
+    first = nfa.closure((start,))
+    index = {first: 0}
+    sets = [first]
+    delta, accept = [], []
+    for current in sets:
+        targets = {}
+        for s in current:
+            for segments, t in nfa.moves[s]:
+                for seg in segments:
+                    targets.setdefault(seg, set()).add(t)
+        row = [DEAD] * n_segments
+        for seg, ts in targets.items():
+            closed = nfa.closure(ts)
+            j = index.get(closed)
+            if j is None:
+                j = index[closed] = len(sets)
+                sets.append(closed)
+            row[seg] = j
+        delta.append(row)
+        accept.append(min((nfa.accept[s] for s in current if s in nfa.accept), default=DEAD))
+    return delta, accept
+
+def minimize(delta, accept):
+    # Moore partition refinement, starting from the split by accepted rule
+    block = list(accept)
+    n_blocks = len(set(block))
+    while True:
+        signatures = {}
+        new_block = [signatures.setdefault((block[s], tuple(block[t] if t != DEAD else DEAD for t in row)), len(signatures))
+                     for s, row in enumerate(delta)]
+        if len(signatures) == n_blocks:
+            break
+        block, n_blocks = new_block, len(signatures)
+    # Renumber so the start state stays 0
+    order = {}
+    for s in range(len(delta)):
+        order.setdefault(new_block[s], len(order))
+    min_delta = [None] * len(order)
+    min_accept = [DEAD] * len(order)
+    for s, row in enumerate(delta):
+        b = order[new_block[s]]
+        if min_delta[b] is None:
+            min_delta[b] = [order[new_block[t]] if t != DEAD else DEAD for t in row]
+            min_accept[b] = accept[s]
+    return min_delta, min_accept
+
+class DFATables:
+    # starts: first code point of each segment; segment_class maps a segment to its column;
+    # transitions is n_states * n_classes, row-major, DEAD where there is no move
+    def __init__(self, rules, skip, starts, segment_class, n_classes, transitions, accept):
+        self.rules = list(rules)
+        self.skip = list(skip)
+        self.starts = array("i", starts)
+        self.segment_class = array("i", segment_class)
+        self.n_classes = n_classes
+        self.transitions = array("i", transitions)
+        self.accept = array("i", accept)
+
+    @property
+    def n_states(self):
+        return len(self.accept)
+
+    def class_of(self, code):
+        return self.segment_class[bisect_right(self.starts, code) - 1]
+
+    def to_source(self):
+        # Python module text that rebuilds these tables without running the generator
+        def ints(values):
+            return "[" + ", ".join(map(str, values)) + "]"
+        return (f"# Generated by lexgen.py: {self.n_states} states, {self.n_classes} character classes\n"
+                f"from lexgen import DFAScanner, DFATables\n\n"
+                f"RULES = {self.rules!r}\n"
+                f"SKIP = {self.skip!r}\n"
+                f"STARTS = {ints(self.starts)}\n"
+                f"SEGMENT_CLASS = {ints(self.segment_class)}\n"
+                f"N_CLASSES = {self.n_classes}\n"
+                f"TRANSITIONS = {ints(self.transitions)}\n"
+                f"ACCEPT = {ints(self.accept)}\n\n"
+                f"tables = DFATables(RULES, SKIP, STARTS, SEGMENT_CLASS, N_CLASSES, TRANSITIONS, ACCEPT)\n"
+                f"scanner = DFAScanner(tables)\n")
+
+def compile_rules(rules, skip=()):
+    # rules: [(name, pattern AST)] in priority order
+    sets = []
+    for _, node in rules:
+        collect_sets(node, sets)
+    bounds = {0}
+    for intervals in sets:
+        for lo, hi in intervals:
+            bounds.add(lo)
+            if hi < MAX_CHAR:
+                bounds.add(hi + 1)
+    starts = sorted(bounds)
+
+    def segments_of(intervals):
+        result = []
+        for lo, hi in intervals:
+            result.extend(range(bisect_right(starts, lo) - 1, bisect_right(starts, hi)))
+        return result
+
+    nfa = NFA()
+    start = nfa.state()
+    for i, (_, node) in enumerate(rules):
+        s, e = nfa.build(node, segments_of)
+        nfa.eps[start].append(s)
+        nfa.accept[e] = i
+    delta, accept = minimize(*subset_construction(nfa, start, len(starts)))
+    # Segments with identical columns become one character class
+    columns = {}
+    segment_class = [columns.setdefault(tuple(row[seg] for row in delta), len(columns)) for seg in range(len(starts))]
+    n_classes = len(columns)
+    transitions = [DEAD] * (len(delta) * n_classes)
+    for s, row in enumerate(delta):
+        for seg, t in enumerate(row):
+            transitions[s * n_classes + segment_class[seg]] = t
+    # Adjacent segments of the same class collapse into one range
+    runs = [i for i in range(len(starts)) if i == 0 or segment_class[i] != segment_class[i - 1]]
+    return DFATables([name for name, _ in rules], skip, [starts[i] for i in runs],
+                     [segment_class[i] for i in runs], n_classes, transitions, accept)
+
+def compile_spec(spec, skip=("SKIP", "NEWLINE")):
+    # Same (kind, regex) spec as lexer.Lexer, in Python regex syntax; the scanner accepts the same tokens
+    return compile_rules([(kind, parse_pattern(pattern, flex=False)) for kind, pattern in spec],
+                         [kind for kind, _ in spec if kind in skip])
+
+def compile_lex_file(path):
+    with open(path, encoding="utf-8") as f:
+        return compile_rules(*parse_lex_file(f.read()))
+
+# === Scanner ===
+class DFAScanner:
+    # Table-driven longest-match scanner; yields lexer.Token like Lexer.tokenize
+    def __init__(self, tables):
+        self.tables = tables
+        n = tables.n_classes
+        flat = tables.transitions
+        self.rows = [list(flat[s * n:(s + 1) * n]) for s in range(tables.n_states)]
+        self.accept = list(tables.accept)
+        self.kinds = tables.rules
+        self.skip = [name in set(tables.skip) for name in tables.rules]
+        # Direct class lookup for Latin-1; everything else goes through bisect
+        self.latin1 = [tables.class_of(c) for c in range(256)]
+
+    def tokenize(self, source):
+        rows, accept, kinds, skip = self.rows, self.accept, self.kinds, self.skip
+        latin1, class_of = self.latin1, self.tables.class_of
+        pos, end_of_input = 0, len(source)
+        line, line_start = 1, 0
+        while pos < end_of_input:
+            state, i = 0, pos
+            rule, match_end = DEAD, pos
+            while i < end_of_input:
+                c = ord(source[i])
+                state = rows[state][latin1[c] if c < 256 else class_of(c)]
+                if state == DEAD:
+                    break
+                i += 1
+                if accept[state] != DEAD:
+                    rule, match_end = accept[state], i
+            if rule == DEAD:
+                raise LexError(f"Invalid character {source[pos]!r} at line {line}, column {pos - line_start + 1}")
+            if not skip[rule]:
+                yield Token(kinds[rule], source[pos:match_end], line, pos - line_start + 1)
+            newlines = source.count("\n", pos, match_end)
+            if newlines:
+                line += newlines
+                line_start = source.rfind("\n", pos, match_end) + 1
+            pos = match_end
+
+    def tokenize_file(self, path):
+        with open(path, encoding="utf-8") as f:
+            yield from self.tokenize(f.read())
+
+def main(argv):
+    # python lexgen.py spec.l [output.py]: prints table sizes, writes the scanner module if asked
+    if not 1 <= len(argv) <= 2:
+        print("usage: python lexgen.py spec.l [output.py]", file=sys.stderr)
+        return 2
+    started = time.perf_counter()
+    tables = compile_lex_file(argv[0])
+    elapsed = time.perf_counter() - started
+    print(f"{argv[0]}: {len(tables.rules)} rules, {tables.n_states} states, {tables.n_classes} classes, "
+          f"{len(tables.transitions)} table entries, {elapsed * 1000:.1f} ms")
+    for i, name in enumerate(tables.rules):
+        print(f"  {i:>2} {name}{' (skipped)' if name in tables.skip else ''}")
+    if len(argv) > 1:
+        with open(argv[1], "w", encoding="utf-8") as f:
+            f.write(tables.to_source())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,86 +1,136 @@
-import pandas as pd
+import itertools
+from array import array
+
+from grammar import GrammarAnalysis
+from render import render
+
+END_OF_INPUT = object()
+
+def _shown(token):
+    return '$' if token is END_OF_INPUT else token
+
 class LL1Parser:
-    def __init__(self, grammar, terminals: set):
+    def __init__(self, grammar, terminals: set, analysis=None):
         self.grammar = grammar
         self.terminals = terminals
         self.non_terminals = list(grammar.keys())
-        self.first_sets = {nt: set() for nt in self.non_terminals}
-        self.follow_sets = {nt: set() for nt in self.non_terminals}
+        self.analysis = analysis or GrammarAnalysis(grammar, terminals=terminals)
+        self.first_sets = {nt: self.analysis.first_set(nt) for nt in self.non_terminals}
+        self.follow_sets = {nt: self.analysis.follow_set(nt) for nt in self.non_terminals}
         self.parsing_table = {}
+        # Filled by construct_parse_table(), which parse() runs on first use
+        self.table = None
+        self.width = 0
+        self.conflicts = []
 
     def compute_first(self, symbol):
-        if symbol not in self.non_terminals:
+        if symbol not in self.first_sets:
             return {symbol}
-
-        if self.first_sets[symbol]:
-            return self.first_sets[symbol]
-
-        first = set()
-        for prod in self.grammar[symbol]:
-            for s in prod:
-                if s == 'ε':
-                    first.add('ε')
-                    break
-                first_s = self.compute_first(s)
-                first.update(first_s - {'ε'})
-                if 'ε' not in first_s:
-                    break
-            else:
-                first.add('ε')
-
-        self.first_sets[symbol] = first
-        return first
+        return self.first_sets[symbol]
 
     def compute_follow(self, symbol):
-        if not self.follow_sets[symbol]:
-            if symbol == self.non_terminals[0]:  # Start symbol
-                self.follow_sets[symbol].add('$')
-
-            for lhs in self.grammar:
-                for prod in self.grammar[lhs]:
-                    if symbol in prod:
-                        idx = prod.index(symbol) + 1
-                        while idx < len(prod):
-                            next_symbol = prod[idx]
-                            first_next = self.compute_first(next_symbol)
-                            self.follow_sets[symbol].update(first_next - {'ε'})
-                            if 'ε' not in first_next:
-                                break
-                            idx += 1
-                        else:
-                            if lhs != symbol:
-                                self.follow_sets[symbol].update(self.compute_follow(lhs))
-
         return self.follow_sets[symbol]
 
     def construct_parse_table(self):
-        for nt in self.non_terminals:
-            self.compute_first(nt)
-            self.compute_follow(nt)
-
         # Initialize the table
         for nt in self.non_terminals:
             self.parsing_table[nt] = {}
             for t in self.terminals.union({'$'}):
                 self.parsing_table[nt][t] = ""
 
+        # Encoded table: table[nt_id * width + terminal_id] is a production index or -1
+        analysis = self.analysis
+        self.width = width = len(analysis.terminals)
+        self.table = [-1] * (analysis.n_nonterminals * width)
+        self.conflicts = []
+
         # Fill table
+        p = 0
         for nt in self.non_terminals:
+            nt_id = analysis.nt_id[nt]
             for prod in self.grammar[nt]:
-                first = set()
-                if prod[0] == 'ε':
-                    first.add('ε')
-                elif prod[0] in self.terminals:
-                    first.add(prod[0])
-                else:
-                    first.update(self.compute_first(prod[0]))
-
-                for terminal in first - {'ε'}:
-                    self.parsing_table[nt][terminal] = f'{nt} -> {" ".join(prod)}'
-
+                entry = f'{nt} -> {" ".join(prod)}'
+                first = analysis.first_of_names(prod)
+                lookaheads = first - {'ε'}
                 if 'ε' in first:
-                    for terminal in self.follow_sets[nt]:
-                        self.parsing_table[nt][terminal] = f'{nt} -> ε'
+                    lookaheads |= self.follow_sets[nt]
+
+                for terminal in lookaheads:
+                    cell = nt_id * width + analysis.term_id[terminal]
+                    if self.table[cell] < 0:
+                        self.table[cell] = p
+                        self.parsing_table[nt][terminal] = entry
+                    else:
+                        self.conflicts.append((nt, terminal, self.parsing_table[nt][terminal], entry))
+                p += 1
+
+    def dump(self):
+        analysis = self.analysis
+        meta = {
+            "terminals": analysis.terminals[:-1],
+            "nullable": hex(analysis.nullable),
+            "first": [hex(bits) for bits in analysis.first],
+            "follow": [hex(bits) for bits in analysis.follow],
+            "conflicts": self.conflicts,
+        }
+        return meta, {"table": array('i', self.table)}
+
+    @classmethod
+    def restore(cls, grammar, terminals, meta, arrays):
+        # arrays may be any int sequence, e.g. memoryviews over a mapped cache file
+        sets = (int(meta["nullable"], 16),
+                [int(bits, 16) for bits in meta["first"]],
+                [int(bits, 16) for bits in meta["follow"]])
+        parser = cls(grammar, terminals, GrammarAnalysis(grammar, terminals=meta["terminals"], sets=sets))
+        parser.width = width = len(parser.analysis.terminals)
+        parser.table = table = arrays["table"]
+        parser.conflicts = [tuple(conflict) for conflict in meta["conflicts"]]
+
+        entries = [f'{nt} -> {" ".join(prod)}' for nt in parser.non_terminals for prod in grammar[nt]]
+        if (len(table) != parser.analysis.n_nonterminals * width
+                or not -1 <= min(table, default=-1) <= max(table, default=-1) < len(entries)):
+            raise ValueError("LL(1) table is inconsistent with the grammar")
+        for nt in parser.non_terminals:
+            base = parser.analysis.nt_id[nt] * width
+            row = parser.parsing_table[nt] = dict.fromkeys(terminals.union({'$'}), "")
+            for i, t in enumerate(parser.analysis.terminals):
+                if table[base + i] >= 0:
+                    row[t] = entries[table[base + i]]
+        return parser
+
+    def parse(self, tokens):
+        # tokens yields terminal names; returns the number of tokens matched.
+        # Only the prediction stack is kept, so memory is bounded by nesting depth, not input length.
+        if self.table is None:
+            self.construct_parse_table()
+        if self.conflicts:
+            raise ValueError(f"Grammar is not LL(1): {len(self.conflicts)} table conflicts")
+        analysis = self.analysis
+        n_nt, width, table = analysis.n_nonterminals, self.width, self.table
+        # '$' in the input is an unknown token; only the sentinel appended below stands for end of input
+        term_id = dict(analysis.term_id)
+        term_id[END_OF_INPUT] = term_id.pop('$')
+        # Right-hand sides reversed once so a prediction is a single stack.extend
+        expansions = [rhs[::-1] for _, rhs in analysis.prods]
+        stack = [n_nt + term_id[END_OF_INPUT], analysis.nt_id[self.non_terminals[0]]]
+        count = 0
+        for token in itertools.chain(tokens, [END_OF_INPUT]):
+            t = term_id.get(token)
+            if t is None:
+                raise SyntaxError(f"Unknown token {token!r} at position {count}")
+            code = n_nt + t
+            while True:
+                top = stack.pop()
+                if top >= n_nt:
+                    if top != code:
+                        raise SyntaxError(f"Expected {analysis.terminals[top - n_nt]!r}, got {_shown(token)!r} at position {count}")
+                    break
+                p = table[top * width + t]
+                if p < 0:
+                    raise SyntaxError(f"Unexpected {_shown(token)!r} at position {count} while parsing {self.non_terminals[top]}")
+                stack.extend(expansions[p])
+            count += 1
+        return count - 1
 
     def print_parsing_table(self):
         print("\n=== LL(1) Parsing Table ===\n")
@@ -92,23 +142,17 @@ class LL1Parser:
                 row.append(self.parsing_table[nt].get(t, ""))
             print("\t".join(row))
         print("\n")
-    def print(self):
-        # List of terminals + '$'
+    def render(self, fmt="text"):
+        # fmt is one of render.RENDERERS: "text", "csv" or "dataframe" (needs pandas)
         terminals = list(self.terminals) + ['$']
-        
-        # Create a 2D dictionary (row: non-terminals, col: terminals)
-        table_dict = {}
-        for nt in self.non_terminals:
-            table_dict[nt] = {}
-            for t in terminals:
-                entry = self.parsing_table[nt].get(t, '')
-                table_dict[nt][t] = entry
+        return render(fmt, self.non_terminals, terminals, self.parsing_table, corner='Non-Terminal')
 
-        # Convert to DataFrame
-        df = pd.DataFrame(table_dict).T  # Transpose to get NTs as rows
-        df.index.name = 'Non-Terminal'
+    def to_dataframe(self):
+        return self.render("dataframe")
+
+    def print(self):
         print("\n=== LL(1) Parsing Table (Structured) ===\n")
-        print(df.fillna('').to_string())
+        print(self.render("text"))
 
 
 # --------------------------
@@ -125,7 +169,9 @@ terminals = {'+', '*', '(', ')', 'id'}
 
 # --------------------------
 # ✅ Driver Code
-parser = LL1Parser(grammar, terminals)
-parser.construct_parse_table()
-parser.print_parsing_table()
-parser.print()
+if __name__ == "__main__":
+    parser = LL1Parser(grammar, terminals)
+    parser.construct_parse_table()
+    parser.print_parsing_table()
+    parser.print()
+    print(f"Parsed {parser.parse(['id', '+', 'id', '*', '(', 'id', ')'])} tokens")
@@ -0,0 +1,174 @@
+import time
+from array import array
+
+from slr import ItemIndex, augment_grammar, build_tables
+
+# ACTION cells: 0 = error, j + 1 = shift to state j, -(p + 1) = reduce by production p.
+# Accept is stored as n_states + 1 so it can never be confused with a shift.
+ERROR = 0
+
+class PackedTables:
+    ARRAYS = ("action", "goto", "prod_lhs", "prod_len")
+
+    def __init__(self, action, goto_table, productions, start_symbol, conflicts=()):
+        # conflicts lists (state, terminal, old, new) cells where the last action written won
+        index = ItemIndex(productions)
+        self.productions = index.prods
+        self.start_symbol = start_symbol
+        self.conflicts = [tuple(conflict) for conflict in conflicts]
+        self.n_states = n_states = max(list(action) + list(goto_table)) + 1
+
+        terminals = sorted({t for row in action.values() for t in row} | {"$"})
+        self.terminals = terminals
+        self.term_id = {t: i for i, t in enumerate(terminals)}
+        self.nonterminals = list(index.by_lhs)
+        nt_id = {nt: i for i, nt in enumerate(self.nonterminals)}
+
+        self.prod_lhs = array("i", (nt_id[lhs] for lhs, _ in index.prods))
+        self.prod_len = array("i", (len(rhs) for _, rhs in index.prods))
+        reduce_id = {f"r{lhs}->{' '.join(rhs)}": p for p, (lhs, rhs) in enumerate(index.prods)}
+
+        self.accept = n_states + 1
+        self.width = len(terminals)
+        self.action = array("i", bytes(4 * n_states * self.width))
+        for state, row in action.items():
+            base = state * self.width
+            for terminal, cell in row.items():
+                if cell == "accept":
+                    code = self.accept
+                elif cell[0] == "s":
+                    code = int(cell[1:]) + 1
+                else:
+                    code = -(reduce_id[cell] + 1)
+                self.action[base + self.term_id[terminal]] = code
+
+        self.goto_width = len(self.nonterminals)
+        self.goto = array("i", [-1]) * (n_states * self.goto_width)
+        for state, row in goto_table.items():
+            for nt, target in row.items():
+                self.goto[state * self.goto_width + nt_id[nt]] = target
+
+    def dump(self):
+        meta = {
+            "start_symbol": self.start_symbol,
+            "productions": [[lhs, list(rhs)] for lhs, rhs in self.productions],
+            "terminals": self.terminals,
+            "nonterminals": self.nonterminals,
+            "n_states": self.n_states,
+            "conflicts": self.conflicts,
+        }
+        return meta, {name: getattr(self, name) for name in self.ARRAYS}
+
+    @classmethod
+    def restore(cls, meta, arrays):
+        # arrays may be any int sequence, e.g. memoryviews over a mapped cache file
+        tables = cls.__new__(cls)
+        tables.start_symbol = meta["start_symbol"]
+        tables.productions = [(lhs, tuple(rhs)) for lhs, rhs in meta["productions"]]
+        tables.terminals = meta["terminals"]
+        tables.term_id = {t: i for i, t in enumerate(tables.terminals)}
+        tables.nonterminals = meta["nonterminals"]
+        tables.n_states = meta["n_states"]
+        tables.conflicts = [tuple(conflict) for conflict in meta["conflicts"]]
+        tables.accept = tables.n_states + 1
+        tables.width = len(tables.terminals)
+        tables.goto_width = len(tables.nonterminals)
+        for name in cls.ARRAYS:
+            setattr(tables, name, arrays[name])
+        # Every cell must index inside the tables, or lr_parse could read out of range
+        n_prods = len(tables.productions)
+        if (len(tables.action) != tables.n_states * tables.width
+                or len(tables.goto) != tables.n_states * tables.goto_width
+                or list(tables.prod_len) != [len(rhs) for _, rhs in tables.productions]
+                or len(tables.prod_lhs) != n_prods
+                or not -n_prods <= min(tables.action, default=0) <= max(tables.action, default=0) <= tables.accept
+                or not -1 <= min(tables.goto, default=-1) <= max(tables.goto, default=-1) < tables.n_states
+                or not 0 <= min(tables.prod_lhs, default=0) <= max(tables.prod_lhs, default=0) < tables.goto_width):
+            raise ValueError("Packed LR tables are inconsistent with their metadata")
+        return tables
+
+    @classmethod
+    def from_grammar(cls, productions, mode="lalr1"):
+        productions, start_symbol = augment_grammar(productions)
+        conflicts = []
+        action, goto_table, _ = build_tables(productions, start_symbol, mode, conflicts)
+        return cls(action, goto_table, productions, start_symbol, conflicts)
+
+    def expected(self, state):
+        base = state * self.width
+        return [t for i, t in enumerate(self.terminals) if self.action[base + i] != ERROR]
+
+def lr_parse(tables, tokens, on_reduce=None):
+    # tokens yields (kind, value) pairs such as ada.tokenize() output; returns the number of tokens shifted
+    if tables.conflicts:
+        raise ValueError(f"Grammar has {len(tables.conflicts)} ACTION table conflicts")
+    action, goto, width, goto_width = tables.action, tables.goto, tables.width, tables.goto_width
+    prod_lhs, prod_len, term_id = tables.prod_lhs, tables.prod_len, tables.term_id
+    stack = [0]
+    state = 0
+    count = 0
+    for token in tokens:
+        t = term_id.get(token[0], -1)
+        if t < 0:
+            raise SyntaxError(f"Unexpected token {token!r} at position {count}")
+        while True:
+            code = action[state * width + t]
+            if code > 0:
+                state = code - 1
+                stack.append(state)
+                break
+            if code == ERROR:
+                raise SyntaxError(f"Unexpected token {token!r} at position {count}, "
+                                  f"expected one of {tables.expected(state)}")
+            p = -code - 1
+            n = prod_len[p]
+            if n:
+                del stack[-n:]
+            state = goto[stack[-1] * goto_width + prod_lhs[p]]
+            stack.append(state)
+            if on_reduce is not None:
+                on_reduce(p)
+        count += 1
+
+    end = term_id["$"]
+    while True:
+        code = action[state * width + end]
+        if code == tables.accept:
+            return count
+        if code == ERROR:
+            raise SyntaxError(f"Unexpected end of input, expected one of {tables.expected(state)}")
+        p = -code - 1
+        n = prod_len[p]
+        if n:
+            del stack[-n:]
+        state = goto[stack[-1] * goto_width + prod_lhs[p]]
+        stack.append(state)
+        if on_reduce is not None:
+            on_reduce(p)
+
+# Grammar over ada.tokenize() token kinds
+ada_grammar = {
+    "Program": [["Stmts"]],
+    "Stmts": [["Stmts", "Stmt"], ["Stmt"]],
+    "Stmt": [["ID", "ASSIGN", "E", "SEMI"]],
+    "E": [["E", "PLUS", "T"], ["E", "MINUS", "T"], ["T"]],
+    "T": [["T", "MULT", "F"], ["T", "DIV", "F"], ["F"]],
+    "F": [["LPAREN", "E", "RPAREN"], ["ID"], ["NUMBER"]],
+}
+
+if __name__ == "__main__":
+    from ada import tokenize
+
+    tables = PackedTables.from_grammar(ada_grammar)
+    tokens = tokenize("x := 5 + 3; y := (x - 1) * 2;")
+    reductions = []
+    lr_parse(tables, tokens, reductions.append)
+    for p in reductions:
+        lhs, rhs = tables.productions[p]
+        print(f"{lhs} -> {' '.join(rhs)}")
+
+    tokens = tokenize("x := (a + 3) * b - 7 / c;\n" * 20000)
+    started = time.perf_counter()
+    shifted = lr_parse(tables, tokens)
+    elapsed = time.perf_counter() - started
+    print(f"\nParsed {shifted} tokens in {elapsed:.3f}s ({shifted / elapsed:,.0f} tokens/sec)")
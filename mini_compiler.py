@@ -1,5 +1,15 @@
-import re
 import pprint
+import sys
+
+from ast_nodes import Assign, BinOp, Name, Num, count_nodes
+from instrument import DISABLED, Instrumentation
+from ir import IRProgram, lower
+from lexer import Lexer
+from optimizer import optimize, print_report
+from precedence import CLOSE, OPEN, parse_operators
+from regalloc import allocate, format_instruction
+from regalloc import print_report as regalloc_report
+from symbols import SymbolTable
 
 # Sample source code
 source_code = """
@@ -10,170 +20,164 @@ d = c + 1
 
 """
 
-# === Phase 1: Lexical Analysis ===
-print("==== Phase 1: Lexical Analysis ====")
-
 token_specification = [
     ('NUMBER',   r'\d+'),
     ('IDENT',    r'[a-zA-Z_]\w*'),
     ('ASSIGN',   r'='),
     ('OP',       r'[+\-*/]'),
+    ('LPAREN',   r'\('),
+    ('RPAREN',   r'\)'),
     ('SKIP',     r'[ \t]+'),
     ('NEWLINE',  r'\n'),
 ]
 
-token_regex = '|'.join(f'(?P<{name}>{pattern})' for name, pattern in token_specification)
-
-tokens_by_line = []
-
-for line_no, line in enumerate(source_code.strip().splitlines(), start=1):
-    line_tokens = []
-    for match in re.finditer(token_regex, line):
-        kind = match.lastgroup
-        value = match.group()
-        if kind == 'SKIP':
-            continue
-        elif kind == 'NEWLINE':
-            break
-        else:
-            line_tokens.append((kind, value))
-    tokens_by_line.append((line_no, line.strip(), line_tokens))
-    print(f"Line {line_no}: {line.strip()}")
-    for token in line_tokens:
-        print(f"  → {token[0]:<8} : {token[1]}")
-print()
+lexer = Lexer(token_specification)
+
+# Token roles for parse_expression (see precedence.py); OP tokens are classified by their value
+EXPRESSION_CLASSES = {
+    'NUMBER': lambda token: Num(int(token[1]), token[1]), 'IDENT': lambda token: Name(token[1], token[2]),
+    'LPAREN': OPEN, 'RPAREN': CLOSE,
+    'OP': {'+': 1, '-': 1, '*': 2, '/': 2},
+}
+
+NUM_REGISTERS = 8
+
+# === Phase 1: Lexical Analysis ===
+def lex(source, symbols=None):
+    # Tokens are (kind, value, sym). With a symbol table each identifier is interned here, once:
+    # sym is its id and value the table's string for it. Without one, sym is None.
+    # CRLF and CR line ends become '\n', and lines are split only there, as the lexer counts them
+    source = source.replace("\r\n", "\n").replace("\r", "\n").strip()
+    tokens_by_line = [(line_no, line.strip(), []) for line_no, line in enumerate(source.split("\n"), start=1)]
+    names = symbols.names if symbols is not None else None
+    for token in lexer.tokenize(source):
+        value, sym = token.value, None
+        if names is not None and token.kind == 'IDENT':
+            sym = symbols.intern(value)
+            value = names[sym]
+        tokens_by_line[token.line - 1][2].append((token.kind, value, sym))
+    return tokens_by_line
 
 # === Phase 2: Syntax Analysis ===
-print("==== Phase 2: Syntax Analysis (Parse Trees) ====")
+def parse_expression(tokens, pos):
+    return parse_operators(tokens, pos, EXPRESSION_CLASSES, BinOp)[0]
 
 def build_parse_tree(tokens):
-    if len(tokens) == 3:
-        return {
-            'assign': {
-                'lhs': tokens[0][1],
-                'rhs': tokens[2][1]
-            }
-        }
-    elif len(tokens) == 5:
-        return {
-            'assign': {
-                'lhs': tokens[0][1],
-                'rhs': {
-                    'op': tokens[3][1],
-                    'left': tokens[2][1],
-                    'right': tokens[4][1]
-                }
-            }
-        }
-    else:
-        return {'error': 'Syntax not supported'}
-
-syntax_trees = []
-for _, line_text, tokens in tokens_by_line:
-    tree = build_parse_tree(tokens)
-    syntax_trees.append(tree)
-    print(f"Syntax Tree for: {line_text}")
-    pprint.pprint(tree, indent=2)
-    print()
+    if len(tokens) < 3 or tokens[0][0] != 'IDENT' or tokens[1][0] != 'ASSIGN':
+        raise SyntaxError(f"Syntax not supported: {' '.join(token[1] for token in tokens)}")
+    return Assign(tokens[0][1], parse_expression(tokens, 2), tokens[0][2])
+
+def tree_view(node):
+    # Nested-dict view of a statement, for display only
+    if isinstance(node, Assign):
+        return {'assign': {'lhs': node.target, 'rhs': tree_view(node.value)}}
+    if isinstance(node, BinOp):
+        return {'op': node.op, 'left': tree_view(node.left), 'right': tree_view(node.right)}
+    return node.text if isinstance(node, Num) else node.id
 
 # === Phase 3: Semantic Analysis ===
-print("\n==== Phase 3: Semantic Analysis ====")
-
-symbol_table = {}
-for tree in syntax_trees:
-    lhs = tree['assign']['lhs']
-    rhs = tree['assign']['rhs']
-    if isinstance(rhs, str):  # direct assignment
-        if rhs.isdigit():
-            symbol_table[lhs] = 'int'
-        elif rhs.isidentifier():
-            if rhs not in symbol_table:
-                print(f"Semantic Error: Undefined variable {rhs}")
-            symbol_table[lhs] = 'int'
-    elif isinstance(rhs, dict):  # expression
-        for operand in (rhs['left'], rhs['right']):
-            if operand.isidentifier() and operand not in symbol_table:
-                print(f"Semantic Error: Undefined variable {operand}")
-        symbol_table[lhs] = 'int'
-    print(f"{lhs} is of type int")
-
-# === Phase 4: Intermediate Code Generation ===
-print("\n==== Phase 4: Intermediate Code Generation ====")
-
-temp_count = 1
-intermediate_code = []
-
-def get_temp():
-    global temp_count
-    t = f"t{temp_count}"
-    temp_count += 1
-    return t
-
-for tree in syntax_trees:
-    lhs = tree['assign']['lhs']
-    rhs = tree['assign']['rhs']
-    if isinstance(rhs, str):
-        intermediate_code.append(f"{lhs} = {rhs}")
-    elif isinstance(rhs, dict):
-        temp = get_temp()
-        intermediate_code.append(f"{temp} = {rhs['left']} {rhs['op']} {rhs['right']}")
-        intermediate_code.append(f"{lhs} = {temp}")
-
-for code in intermediate_code:
-    print(code)
-
-# === Phase 5: Code Optimization (Constant Folding) ===
-print("\n==== Phase 5: Code Optimization (Constant Folding) ====")
-
-optimized_code = []
-for code in intermediate_code:
-    match = re.match(r"(t\d+) = (\d+) ([+\-*/]) (\d+)", code)
-    if match:
-        t, val1, op, val2 = match.groups()
-        result = eval(f"{val1}{op}{val2}")
-        optimized_code.append(f"{t} = {result}")
-        print(f"Optimized: {code}  =>  {t} = {result}")
-    else:
-        optimized_code.append(code)
-
-# === Phase 6: Target Code Generation ===
-print("\n==== Phase 6: Target Code Generation ====")
-
-register_count = 0
-
-def get_reg():
-    global register_count
-    r = f"R{register_count}"
-    register_count += 1
-    return r
-
-for code in optimized_code:
-    parts = code.split('=')
-    if len(parts) != 2:
-        print(f"Skipping malformed line: {code}")
-        continue
-
-    left, right = map(str.strip, parts)
-    tokens = right.split()
-
-    if len(tokens) == 1:
-        reg = get_reg()
-        print(f"LOAD {reg}, {tokens[0]}")
-        print(f"MOV {left}, {reg}")
-    elif len(tokens) == 3:
-        op1, op, op2 = tokens
-        reg1 = get_reg()
-        reg2 = get_reg()
-        reg3 = get_reg()
-        print(f"LOAD {reg1}, {op1}")
-        print(f"LOAD {reg2}, {op2}")
-        instr = {
-            '+': "ADD",
-            '-': "SUB",
-            '*': "MUL",
-            '/': "DIV"
-        }.get(op, "UNKNOWN")
-        print(f"{instr} {reg3}, {reg1}, {reg2}")
-        print(f"MOV {left}, {reg3}")
-    else:
-        print(f"Unsupported expression: {right}")
+def check_semantics(syntax_trees, symbols=None, lines=None):
+    # Records def/use lines in the symbol table; each undefined name is reported once, at its first use.
+    # Ids carried by the nodes are used as they are, so symbols must be the table given to lex();
+    # without a table every name is interned here.
+    trusted = symbols is not None
+    symbols = SymbolTable() if symbols is None else symbols
+    intern = symbols.intern
+    errors = []
+    reported = set()
+    for n, tree in enumerate(syntax_trees):
+        line = lines[n] if lines is not None else n + 1
+        stack = [tree.value]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, BinOp):
+                stack.append(node.right)
+                stack.append(node.left)
+            elif isinstance(node, Name):
+                i = node.sym if trusted and node.sym is not None else intern(node.id)
+                if symbols.use(i, line) is None and i not in reported:
+                    reported.add(i)
+                    errors.append(f"Semantic Error: Undefined variable {node.id} (line {line})")
+        symbols.define(tree.sym if trusted and tree.sym is not None else intern(tree.target), 'int', line)
+    return symbols, errors
+
+def main(argv=()):
+    # --stats PATH writes a per-phase JSON report; --profile adds cProfile hot spots to it
+    argv = list(argv)
+    stats_path = None
+    if "--stats" in argv:
+        at = argv.index("--stats") + 1
+        if at == len(argv) or argv[at].startswith("--"):
+            print("usage: python mini_compiler.py [--stats PATH] [--profile]", file=sys.stderr)
+            return 2
+        stats_path = argv[at]
+    profile = "--profile" in argv
+    instrumentation = (Instrumentation("source_code", memory=True, profile=profile)
+                       if stats_path or profile else DISABLED)
+    phase = instrumentation.phase
+
+    print("==== Phase 1: Lexical Analysis ====")
+    symbols = SymbolTable()
+    with phase("lex") as p:
+        tokens_by_line = lex(source_code, symbols)
+        p.count("tokens", sum(len(line_tokens) for _, _, line_tokens in tokens_by_line))
+    for line_no, line_text, line_tokens in tokens_by_line:
+        print(f"Line {line_no}: {line_text}")
+        for token in line_tokens:
+            print(f"  → {token[0]:<8} : {token[1]}")
+    print()
+
+    print("==== Phase 2: Syntax Analysis (Parse Trees) ====")
+    with phase("parse") as p:
+        syntax_trees = [build_parse_tree(tokens) for _, _, tokens in tokens_by_line if tokens]
+        if p.enabled:
+            p.count("nodes", sum(count_nodes(tree) for tree in syntax_trees))
+    for (_, line_text, _), tree in zip((line for line in tokens_by_line if line[2]), syntax_trees):
+        print(f"Syntax Tree for: {line_text}")
+        pprint.pprint(tree_view(tree), indent=2)
+        print()
+
+    print("\n==== Phase 3: Semantic Analysis ====")
+    with phase("semantic") as p:
+        lines = [line_no for line_no, _, tokens in tokens_by_line if tokens]
+        symbols, errors = check_semantics(syntax_trees, symbols, lines)
+        p.count("symbols", len(symbols.symbols))
+    for error in errors:
+        print(error)
+    for tree in syntax_trees:
+        print(f"{tree.target} is of type {symbols.lookup(tree.sym).type}")
+
+    print("\n==== Phase 4: Intermediate Code Generation ====")
+    with phase("ir") as p:
+        program = lower(IRProgram(symbols), syntax_trees)
+        p.count("quads", len(program.code))
+    for line in program.lines():
+        print(line)
+
+    print("\n==== Phase 5: Code Optimization ====")
+    before = len(program.code)
+    with phase("optimize") as p:
+        report = optimize(program)
+        p.count("quads", len(program.code))
+    for line in program.lines():
+        print(line)
+    print_report(report, before, len(program.code))
+
+    print("\n==== Phase 6: Target Code Generation ====")
+    with phase("codegen") as p:
+        instructions, report = allocate(program, NUM_REGISTERS)
+        p.count("instructions", report["instructions"])
+    for instruction in instructions:
+        print(format_instruction(instruction))
+    regalloc_report(report)
+
+    if instrumentation.enabled:
+        instrumentation.close()
+        print("\n==== Phase Statistics ====")
+        instrumentation.print_summary()
+        if stats_path:
+            instrumentation.to_json(stats_path)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,160 @@
+# Optimization passes over ir.IRProgram (straight-line three-address code).
+# Each pass rewrites program.code in place and returns how many quads it rewrote;
+# optimize() runs a pipeline to a fixed point and reports what every pass removed.
+
+from ir import BINARY_OPS, CONST, TEMP, Quad, evaluate, kind_of
+
+COMMUTATIVE = ('+', '*', '==', '!=')
+
+def _foldable(program, op, a, b):
+    return (kind_of(a) == CONST and kind_of(b) == CONST
+            and not (op in ('/', '%') and program.value_of(b) == 0))
+
+def _identity(program, op, a, b):
+    # Operand that op(a, b) reduces to when one side is a neutral constant, else None
+    zero, one = program.const_ref(0), program.const_ref(1)
+    if (op == '+' or op == '-') and b == zero or op in ('*', '/') and b == one:
+        return a
+    if op == '+' and a == zero or op == '*' and a == one:
+        return b
+    if op == '*' and (a == zero or b == zero):
+        return zero
+    return None
+
+def constant_propagation(program):
+    known = {}
+    rewritten = 0
+    for i, quad in enumerate(program.code):
+        a = known.get(quad.a, quad.a)
+        b = known.get(quad.b, quad.b) if quad.b is not None else None
+        same = _identity(program, quad.op, a, b) if quad.op in BINARY_OPS else None
+        if quad.op in BINARY_OPS and _foldable(program, quad.op, a, b):
+            new = Quad('copy', quad.dst, program.const(evaluate(quad.op, program.value_of(a), program.value_of(b))))
+        elif same is not None:
+            new = Quad('copy', quad.dst, same)
+        elif a != quad.a or b != quad.b:
+            new = Quad(quad.op, quad.dst, a, b)
+        else:
+            new = quad
+        if new is not quad:
+            program.code[i] = new
+            rewritten += 1
+        if new.op == 'copy' and kind_of(new.a) == CONST:
+            known[new.dst] = new.a
+        else:
+            known.pop(new.dst, None)
+    return rewritten
+
+def copy_propagation(program):
+    copies = {}
+    copied_from = {}
+    rewritten = 0
+    for i, quad in enumerate(program.code):
+        a = copies.get(quad.a, quad.a)
+        b = copies.get(quad.b, quad.b) if quad.b is not None else None
+        if a != quad.a or b != quad.b:
+            quad = program.code[i] = Quad(quad.op, quad.dst, a, b)
+            rewritten += 1
+        # dst is redefined: forget what it was a copy of and every copy taken from it
+        dst = quad.dst
+        source = copies.pop(dst, None)
+        if source is not None:
+            copied_from[source].discard(dst)
+        for stale in copied_from.pop(dst, ()):
+            copies.pop(stale, None)
+        if quad.op == 'copy' and kind_of(quad.a) != CONST and quad.a != dst:
+            copies[dst] = quad.a
+            copied_from.setdefault(quad.a, set()).add(dst)
+    return rewritten
+
+def value_numbering(program):
+    # Local value numbering: a repeated (op, a, b) becomes a copy from the operand that already holds it
+    available = {}
+    depends = {}
+    rewritten = 0
+    for i, quad in enumerate(program.code):
+        key = holder = None
+        if quad.op in BINARY_OPS:
+            a, b = quad.a, quad.b
+            if quad.op in COMMUTATIVE and b < a:
+                a, b = b, a
+            key = (quad.op, a, b)
+            holder = available.get(key)
+            if holder is not None:
+                quad = program.code[i] = Quad('copy', quad.dst, holder)
+                rewritten += 1
+        # dst is redefined: drop expressions that read it or were held in it
+        dst = quad.dst
+        for stale in depends.pop(dst, ()):
+            available.pop(stale, None)
+        if key is not None and holder is None and dst != key[1] and dst != key[2]:
+            available[key] = dst
+            for ref in (key[1], key[2], dst):
+                depends.setdefault(ref, []).append(key)
+    return rewritten
+
+def coalesce_copies(program):
+    # "t = a op b; x = t" with t used nowhere else becomes "x = a op b"
+    use_count = {}
+    for quad in program.code:
+        for ref in (quad.a, quad.b):
+            if ref is not None and kind_of(ref) == TEMP:
+                use_count[ref] = use_count.get(ref, 0) + 1
+    code = []
+    merged = 0
+    for quad in program.code:
+        if (quad.op == 'copy' and code and code[-1].dst == quad.a and kind_of(quad.a) == TEMP
+                and use_count.get(quad.a) == 1):
+            previous = code.pop()
+            quad = Quad(previous.op, quad.dst, previous.a, previous.b)
+            merged += 1
+        code.append(quad)
+    program.code = code
+    return merged
+
+def dead_code_elimination(program, live_out=None):
+    # Backward liveness; every variable is observable at exit unless live_out says otherwise
+    live = set(live_out) if live_out is not None else {program.var(name) for name in program.names}
+    kept = []
+    for quad in reversed(program.code):
+        if quad.dst not in live or (quad.op == 'copy' and quad.a == quad.dst):
+            continue
+        live.discard(quad.dst)
+        live.add(quad.a)
+        if quad.b is not None:
+            live.add(quad.b)
+        kept.append(quad)
+    kept.reverse()
+    program.code = kept
+    return 0
+
+PASSES = {
+    "constants": constant_propagation,
+    "copies": copy_propagation,
+    "cse": value_numbering,
+    "coalesce": coalesce_copies,
+    "dce": dead_code_elimination,
+}
+
+DEFAULT_PIPELINE = ("constants", "copies", "cse", "coalesce", "dce")
+
+def optimize(program, pipeline=DEFAULT_PIPELINE, max_rounds=10):
+    report = {name: {"pass": name, "removed": 0, "rewritten": 0} for name in pipeline}
+    for _ in range(max_rounds):
+        changed = False
+        for name in pipeline:
+            before = len(program.code)
+            rewritten = PASSES[name](program)
+            removed = before - len(program.code)
+            report[name]["removed"] += removed
+            report[name]["rewritten"] += rewritten
+            changed = changed or rewritten or removed
+        if not changed:
+            break
+    return list(report.values())
+
+def print_report(report, before, after):
+    for entry in report:
+        print(f"  {entry['pass']:<10} removed {entry['removed']:>4}  rewrote {entry['rewritten']:>4}")
+    print(f"  {before} -> {after} instructions")
+
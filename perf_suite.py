@@ -0,0 +1,195 @@
+# Benchmark runner over every pipeline stage, compared against a stored baseline.
+#
+# Stage times are divided by the time of a fixed pure-Python calibration loop measured
+# alongside them, so a baseline recorded on one machine is still meaningful on another.
+# A stage regresses when its normalized time exceeds the baseline by more than the
+# threshold ratio.
+#
+#   python perf_suite.py                   compare against perf_baseline.json
+#   python perf_suite.py --save            record a new baseline
+#   python perf_suite.py --scale 4 --threshold 1.5 --stage parse --stage codegen
+
+import json
+import os
+import platform
+import sys
+import time
+
+from workloads import (chain_statement, generate_assignments, generate_program, nested_statement,
+                       random_grammar)
+
+BASELINE_PATH = os.environ.get("PERF_BASELINE", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                             "perf_baseline.json"))
+DEFAULT_THRESHOLD = 1.5
+
+def calibrate():
+    started = time.perf_counter()
+    table = {}
+    for i in range(100000):
+        table[i & 1023] = table.get(i & 1023, 0) + i
+    return time.perf_counter() - started
+
+def _ada_source(scale):
+    return "\n".join([generate_program(2000 * scale, seed=1), nested_statement(500 * scale),
+                      chain_statement(5000 * scale)])
+
+def setup_tokenize(scale):
+    return _ada_source(scale)
+
+def run_tokenize(source):
+    from ada import lexer
+    for _ in lexer.tokenize(source):
+        pass
+
+def setup_parse(scale):
+    from ada import tokenize
+    return tokenize(_ada_source(4 * scale))
+
+def run_parse(tokens):
+    from ada import AdaParser
+    AdaParser(tokens).parse_statements()
+
+def setup_first_follow(scale):
+    return random_grammar(3000 * scale, seed=2)
+
+def run_first_follow(grammar):
+    from grammar import GrammarAnalysis
+    GrammarAnalysis(grammar)
+
+def setup_lr_items(scale):
+    from slr import augment_grammar
+    return augment_grammar(random_grammar(1000 * scale, seed=3))
+
+def run_lr_items(workload):
+    from slr import LR0Automaton
+    LR0Automaton(*workload)
+
+def setup_tac(scale):
+    return generate_assignments(5000 * scale, seed=4).splitlines()
+
+def run_tac(statements):
+    from tac import IntermediateCodeGenerator
+    for _ in IntermediateCodeGenerator().stream_tac(statements):
+        pass
+
+def _trees(scale, seed):
+    from mini_compiler import build_parse_tree, lex
+    return [build_parse_tree(tokens) for _, _, tokens in lex(generate_assignments(5000 * scale, seed=seed)) if tokens]
+
+def setup_optimize(scale):
+    return _trees(scale, 5)
+
+def run_optimize(trees):
+    from ir import IRProgram, lower
+    from optimizer import optimize
+    optimize(lower(IRProgram(), trees))
+
+def setup_codegen(scale):
+    from ir import IRProgram, lower
+    from optimizer import optimize
+    program = lower(IRProgram(), _trees(4 * scale, 6))
+    optimize(program)
+    return program
+
+def run_codegen(program):
+    from regalloc import allocate
+    allocate(program, 8)
+
+# name -> (setup(scale) -> workload, run(workload)); only run is timed
+STAGES = {
+    "tokenize": (setup_tokenize, run_tokenize),
+    "parse": (setup_parse, run_parse),
+    "first_follow": (setup_first_follow, run_first_follow),
+    "lr_items": (setup_lr_items, run_lr_items),
+    "tac": (setup_tac, run_tac),
+    "optimize": (setup_optimize, run_optimize),
+    "codegen": (setup_codegen, run_codegen),
+}
+
+def time_stage(name, scale=1, repeat=5):
+    # (best seconds, best calibration seconds); each repeat is paired with a calibration run so
+    # both minima come from the same stretch of machine load
+    setup, run = STAGES[name]
+    workload = setup(scale)
+    best = calibration = float("inf")
+    for _ in range(repeat):
+        calibration = min(calibration, calibrate())
+        started = time.perf_counter()
+        run(workload)
+        best = min(best, time.perf_counter() - started)
+    return best, calibration
+
+def run_suite(stages=None, scale=1, repeat=5):
+    results = {}
+    for name in stages or STAGES:
+        seconds, calibration = time_stage(name, scale, repeat)
+        results[name] = {"seconds": seconds, "calibration_seconds": calibration, "normalized": seconds / calibration}
+    return {"python": platform.python_version(), "scale": scale, "stages": results}
+
+def load_baseline(path=BASELINE_PATH):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_baseline(report, path=BASELINE_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    # One row per stage: (name, baseline normalized, current normalized, ratio, regressed); None when not in the baseline
+    if baseline.get("scale") != report["scale"]:
+        raise ValueError(f"Baseline was recorded at scale {baseline.get('scale')}, this run used {report['scale']}")
+    rows = []
+    for name, result in report["stages"].items():
+        base = baseline["stages"].get(name)
+        if base is None:
+            rows.append((name, None, result["normalized"], None, False))
+            continue
+        ratio = result["normalized"] / base["normalized"]
+        rows.append((name, base["normalized"], result["normalized"], ratio, ratio > threshold))
+    return rows
+
+def print_comparison(report, rows):
+    print(f"scale {report['scale']}, Python {report['python']}")
+    for name, base, current, ratio, regressed in rows:
+        seconds = report["stages"][name]["seconds"]
+        if ratio is None:
+            print(f"  {name:<13} {seconds * 1000:9.1f} ms  (no baseline)")
+        else:
+            print(f"  {name:<13} {seconds * 1000:9.1f} ms  {ratio:6.2f}x baseline  {'REGRESSION' if regressed else 'ok'}")
+
+def main(argv):
+    save = False
+    path, threshold, scale, stages = BASELINE_PATH, DEFAULT_THRESHOLD, 1, []
+    args = iter(argv)
+    for arg in args:
+        if arg == "--save":
+            save = True
+        elif arg == "--baseline":
+            path = next(args)
+        elif arg == "--threshold":
+            threshold = float(next(args))
+        elif arg == "--scale":
+            scale = int(next(args))
+        elif arg == "--stage":
+            stages.append(next(args))
+        else:
+            raise SystemExit(f"Unknown argument: {arg}")
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        raise SystemExit(f"Unknown stages: {', '.join(unknown)} (known: {', '.join(STAGES)})")
+    report = run_suite(stages, scale)
+    if save:
+        save_baseline(report, path)
+        for name, result in report["stages"].items():
+            print(f"  {name:<13} {result['seconds'] * 1000:9.1f} ms")
+        print(f"Baseline written to {path}")
+        return 0
+    if not os.path.exists(path):
+        raise SystemExit(f"No baseline at {path}; record one with --save")
+    rows = compare(report, load_baseline(path), threshold)
+    print_comparison(report, rows)
+    return 1 if any(row[4] for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
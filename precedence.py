@@ -0,0 +1,81 @@
+# Operator-precedence expression parsing shared by the front ends (ada.py, calc.py,
+# mini_compiler.py, tac.py).
+#
+# Tokens are sequences starting (kind, value, ...); a token with a fourth item has its column
+# there, which error messages quote. classes maps a token kind to its role:
+#   OPEN, CLOSE      a parenthesis
+#   int              a left-associative binary operator of that binding power
+#   callable         an operand; called with the token, returns the operand
+#   dict             roles by token value, for a kind such as 'OP' that covers several operators
+# Lexers that give each operator its own kind cost one dictionary lookup per token.
+# binary(op, a, b) combines two operands, op being the operator token's value. prefix maps
+# the values of prefix operators to their binding power, and unary(op, a) applies one.
+
+OPEN, CLOSE = "(", ")"
+
+def _at(token):
+    return f" at column {token[3]}" if len(token) > 3 else ""
+
+def _reduce(entry, operands, binary, unary):
+    _, op, is_prefix = entry
+    if is_prefix:
+        operands.append(unary(op, operands.pop()))
+    else:
+        b = operands.pop()
+        operands.append(binary(op, operands.pop(), b))
+
+def parse_operators(tokens, pos, classes, binary, prefix=None, unary=None, stop=False):
+    # Returns (expression, position after it). With stop the expression ends at the first token
+    # that cannot continue it, such as ';'; otherwise every token up to the end must belong to it.
+    # None on the operator stack marks '('; other entries are (binding power, op, is_prefix).
+    prefix = prefix or {}
+    operands, operators = [], []
+    push, pop = operands.append, operands.pop
+    depth = 0
+    expect_operand = True
+    end = len(tokens)
+    while pos < end:
+        token = tokens[pos]
+        role = classes.get(token[0])
+        if role.__class__ is dict:
+            role = role.get(token[1])
+        if expect_operand:
+            if role is OPEN:
+                operators.append(None)
+                depth += 1
+            elif role is None or role is CLOSE or role.__class__ is int:
+                if token[1] not in prefix:
+                    raise SyntaxError(f"Unexpected {token[1]!r}{_at(token)}")
+                operators.append((prefix[token[1]], token[1], True))
+            else:
+                push(role(token))
+                expect_operand = False
+        elif role.__class__ is int:
+            while operators and operators[-1] is not None and operators[-1][0] >= role:
+                _, op, is_prefix = operators.pop()
+                if is_prefix:
+                    push(unary(op, pop()))
+                else:
+                    b = pop()
+                    push(binary(op, pop(), b))
+            operators.append((role, token[1], False))
+            expect_operand = True
+        elif role is CLOSE and depth:
+            while operators[-1] is not None:
+                _reduce(operators.pop(), operands, binary, unary)
+            operators.pop()
+            depth -= 1
+        elif stop:
+            break
+        elif role is CLOSE:
+            raise SyntaxError(f"Unmatched ')'{_at(token)}")
+        else:
+            raise SyntaxError(f"Unexpected {token[1]!r}{_at(token)}")
+        pos += 1
+    if expect_operand:
+        raise SyntaxError("Incomplete expression" if operands or operators else "Empty expression")
+    if depth:
+        raise SyntaxError("Missing closing parenthesis")
+    while operators:
+        _reduce(operators.pop(), operands, binary, unary)
+    return operands[0], pos
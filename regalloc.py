@@ -0,0 +1,117 @@
+# Register allocation for ir.IRProgram: live intervals + linear scan with spilling.
+#
+# Every value (a temporary, a constant, or a variable's value between two
+# assignments) gets one live interval. Positions are half-steps so that at quad i
+# operands are read at 2*i and the result is written at 2*i + 1, which lets a
+# result reuse the register of an operand that dies at i. A copy does not create a
+# new value, the destination simply shares the source's interval. The last two
+# registers are kept as scratch for spilled values.
+
+from bisect import insort
+
+from ir import TEMP, VAR, kind_of
+
+OPCODES = {'+': "ADD", '-': "SUB", '*': "MUL", '/': "DIV", '%': "MOD",
+           '<': "LT", '<=': "LE", '>': "GT", '>=': "GE", '==': "EQ", '!=': "NE"}
+
+def live_intervals(program):
+    current = {}
+    start, end, entry = [], [], []
+    operands = []
+
+    def new_value(pos, ref):
+        start.append(pos)
+        end.append(pos)
+        entry.append(ref)
+        return len(start) - 1
+
+    def use(ref, i):
+        v = current.get(ref)
+        if v is None:
+            v = current[ref] = new_value(2 * i, ref)
+        end[v] = 2 * i
+        return v
+
+    for i, quad in enumerate(program.code):
+        a = use(quad.a, i)
+        b = use(quad.b, i) if quad.b is not None else None
+        d = a if quad.op == 'copy' else new_value(2 * i + 1, None)
+        current[quad.dst] = d
+        operands.append((a, b, d))
+    return start, end, entry, operands
+
+def linear_scan(start, end, n_registers):
+    # Returns (register index or None per value, number of spilled values, peak pressure)
+    location = [None] * len(start)
+    free = list(range(n_registers - 1, -1, -1))
+    active = []
+    spills = 0
+    peak = 0
+    for v in sorted(range(len(start)), key=start.__getitem__):
+        while active and active[0][0] < start[v]:
+            free.append(location[active.pop(0)[1]])
+        peak = max(peak, len(active) + 1)
+        if free:
+            location[v] = free.pop()
+            insort(active, (end[v], v))
+        elif active[-1][0] > end[v]:
+            victim = active.pop()[1]
+            location[v], location[victim] = location[victim], None
+            insort(active, (end[v], v))
+            spills += 1
+        else:
+            spills += 1
+    return location, spills, peak
+
+def allocate(program, num_registers=8):
+    # Returns (instructions, report); instructions are (opcode, operand, ...) tuples
+    if num_registers < 3:
+        raise ValueError("Register allocation needs at least 3 registers (2 are scratch)")
+    start, end, entry, operands = live_intervals(program)
+    location, spills, peak = linear_scan(start, end, num_registers - 2)
+    scratch = (f"R{num_registers - 2}", f"R{num_registers - 1}")
+    reg = [None if r is None else f"R{r}" for r in location]
+    loaded = [False] * len(start)
+    text = program.operand_text
+    out = []
+
+    def fetch(v, ref, spare):
+        r = reg[v]
+        if r is None:
+            out.append(("LOAD", spare, text(ref)))
+            return spare
+        if not loaded[v]:
+            out.append(("LOAD", r, text(entry[v])))
+            loaded[v] = True
+        return r
+
+    for quad, (a, b, d) in zip(program.code, operands):
+        ra = fetch(a, quad.a, scratch[0])
+        if quad.op == 'copy':
+            rd = ra
+        else:
+            rb = fetch(b, quad.b, scratch[1])
+            rd = reg[d] or scratch[0]
+            out.append((OPCODES[quad.op], rd, ra, rb))
+            loaded[d] = True
+        kind = kind_of(quad.dst)
+        if kind == VAR or kind == TEMP and reg[d] is None:
+            out.append(("MOV", text(quad.dst), rd))
+
+    report = {
+        "instructions": len(out),
+        "loads": sum(1 for ins in out if ins[0] == "LOAD"),
+        "stores": sum(1 for ins in out if ins[0] == "MOV"),
+        "spills": spills,
+        "peak_pressure": peak,
+        "registers": num_registers,
+    }
+    return out, report
+
+def format_instruction(instruction):
+    return f"{instruction[0]} {', '.join(instruction[1:])}"
+
+def print_report(report):
+    print(f"  {report['instructions']} instructions ({report['loads']} loads, {report['stores']} stores), "
+          f"{report['spills']} spills, peak pressure {report['peak_pressure']} "
+          f"with {report['registers']} registers")
@@ -0,0 +1,48 @@
+import csv
+import io
+
+# Renderers for 2D parse tables: rows are labels (e.g. nonterminals or states),
+# columns are terminals, cells[row][column] is the entry text.
+
+def render_text(rows, columns, cells, corner=""):
+    header = [corner] + list(columns)
+    body = [[str(row)] + [str(cells.get(row, {}).get(col, "")) for col in columns] for row in rows]
+    widths = [max(len(line[i]) for line in [header] + body) for i in range(len(header))]
+    lines = []
+    for line in [header] + body:
+        first = line[0].ljust(widths[0])
+        rest = (cell.rjust(width) for cell, width in zip(line[1:], widths[1:]))
+        lines.append("  ".join([first, *rest]).rstrip())
+    return "\n".join(lines)
+
+def render_csv(rows, columns, cells, corner=""):
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow([corner] + list(columns))
+    for row in rows:
+        writer.writerow([row] + [cells.get(row, {}).get(col, "") for col in columns])
+    return out.getvalue()
+
+def render_dataframe(rows, columns, cells, corner=""):
+    # pandas is optional and only imported when a DataFrame is actually requested
+    try:
+        import pandas as pd
+    except ImportError:
+        raise ImportError("The 'dataframe' renderer requires pandas") from None
+    df = pd.DataFrame([[cells.get(row, {}).get(col, "") for col in columns] for row in rows],
+                      index=list(rows), columns=list(columns))
+    df.index.name = corner or None
+    return df
+
+RENDERERS = {
+    "text": render_text,
+    "csv": render_csv,
+    "dataframe": render_dataframe,
+}
+
+def render(fmt, rows, columns, cells, corner=""):
+    try:
+        renderer = RENDERERS[fmt]
+    except KeyError:
+        raise ValueError(f"Unknown table format: {fmt}") from None
+    return renderer(rows, columns, cells, corner)
@@ -1,5 +1,9 @@
+import sys
+import time
 from collections import defaultdict, deque
 
+from grammar import GrammarAnalysis
+
 # Step 1: Grammar
 productions = {
     "S": [["C", "C"]],
@@ -13,107 +17,309 @@ def augment_grammar(productions):
     new_productions.update(productions)
     return new_productions, "S'"
 
-productions, start_symbol = augment_grammar(productions)
-
-# Step 2: FIRST and FOLLOW sets
+# Step 2: FIRST and FOLLOW sets (computed by grammar.GrammarAnalysis)
 def compute_first(productions):
-    first = defaultdict(set)
-
-    def first_of(symbol):
-        if symbol not in productions:
-            return {symbol}
-        if symbol in first and first[symbol]:
-            return first[symbol]
-        for prod in productions[symbol]:
-            for sym in prod:
-                first[symbol] |= first_of(sym)
-                if "ε" not in first_of(sym):
-                    break
-        return first[symbol]
+    analysis = GrammarAnalysis(productions)
+    return defaultdict(set, {nt: analysis.first_set(nt) for nt in productions})
 
-    for nt in productions:
-        first_of(nt)
-    return first
+def compute_follow(productions, start_symbol, first=None):
+    analysis = GrammarAnalysis(productions, start_symbol)
+    return defaultdict(set, {nt: analysis.follow_set(nt) for nt in productions})
 
-def compute_follow(productions, start_symbol, first):
-    follow = defaultdict(set)
-    follow[start_symbol].add("$")
-
-    while True:
-        updated = False
+# Step 3: Closure and GOTO (for LR(0) items)
+class ItemIndex:
+    # Items are interned as integers: the items of production p are
+    # prod_start[p] .. prod_start[p] + len(rhs), one per dot position.
+    def __init__(self, productions):
+        self.prods = []
+        self.prod_start = []
+        self.item_prod = []
+        self.item_dot = []
+        self.item_next = []
+        self.by_lhs = {}
         for lhs, rhs_list in productions.items():
             for rhs in rhs_list:
-                for i, symbol in enumerate(rhs):
-                    if symbol in productions:
-                        follow_set = set()
-                        for sym in rhs[i+1:]:
-                            follow_set |= (first[sym] - {"ε"})
-                            if "ε" not in first[sym]:
-                                break
-                        else:
-                            follow_set |= follow[lhs]
-                        if not follow_set.issubset(follow[symbol]):
-                            follow[symbol] |= follow_set
-                            updated = True
-        if not updated:
-            break
-    return follow
+                rhs = tuple(sym for sym in rhs if sym != "ε")
+                p = len(self.prods)
+                self.prods.append((lhs, rhs))
+                self.by_lhs.setdefault(lhs, []).append(p)
+                self.prod_start.append(len(self.item_prod))
+                for dot in range(len(rhs) + 1):
+                    self.item_prod.append(p)
+                    self.item_dot.append(dot)
+                    self.item_next.append(rhs[dot] if dot < len(rhs) else None)
+        self.symbols = list(dict.fromkeys(sym for _, rhs in self.prods for sym in rhs))
+        self._predicted = {}
+        self._closures = {}
 
-# Step 3: Closure and GOTO (for LR(0) items)
-def closure(items, productions):
-    closure_set = items[:]
-    added = True
-    while added:
-        added = False
-        new_items = []
-        for lhs, rhs, dot in closure_set:
-            if dot < len(rhs) and rhs[dot] in productions:
-                B = rhs[dot]
-                for prod in productions[B]:
-                    item = (B, tuple(prod), 0)
-                    if item not in closure_set and item not in new_items:
-                        new_items.append(item)
-                        added = True
-        closure_set.extend(new_items)
-    return closure_set
-
-def goto(items, symbol, productions):
-    moved = []
-    for lhs, rhs, dot in items:
-        if dot < len(rhs) and rhs[dot] == symbol:
-            moved.append((lhs, tuple(rhs), dot+1))
-    return closure(moved, productions)
+    def item(self, i):
+        lhs, rhs = self.prods[self.item_prod[i]]
+        return (lhs, rhs, self.item_dot[i])
+
+    def predicted(self, nt):
+        # Initial items of every production reachable from nt through leftmost nonterminals
+        items = self._predicted.get(nt)
+        if items is None:
+            items = set()
+            seen = {nt}
+            stack = [nt]
+            while stack:
+                for p in self.by_lhs[stack.pop()]:
+                    start = self.prod_start[p]
+                    items.add(start)
+                    sym = self.item_next[start]
+                    if sym in self.by_lhs and sym not in seen:
+                        seen.add(sym)
+                        stack.append(sym)
+            items = self._predicted[nt] = frozenset(items)
+        return items
+
+    def closure(self, kernel):
+        items = self._closures.get(kernel)
+        if items is None:
+            items = set(kernel)
+            for i in kernel:
+                sym = self.item_next[i]
+                if sym in self.by_lhs:
+                    items |= self.predicted(sym)
+            items = self._closures[kernel] = frozenset(items)
+        return items
+
+def closure(kernel, index):
+    return index.closure(frozenset(kernel))
+
+def goto(items, symbol, index):
+    kernel = frozenset(i + 1 for i in items if index.item_next[i] == symbol)
+    return index.closure(kernel) if kernel else frozenset()
 
 # Step 4: Canonical collection of LR(0) items
-def canonical_collection(productions):
-    start_item = (start_symbol, tuple(productions[start_symbol][0]), 0)
-    C = [closure([start_item], productions)]
-    states = [C[0]]
-    transitions = {}
-
-    while True:
-        new_states = []
-        symbols = set(sym for prods in productions.values() for rhs in prods for sym in rhs)
-        for i, state in enumerate(states):
-            for sym in symbols:
-                next_state = goto(state, sym, productions)
-                if next_state and next_state not in states and next_state not in new_states:
-                    new_states.append(next_state)
-                    transitions[(i, sym)] = len(states) + len(new_states) - 1
-                elif next_state:
-                    existing_index = states.index(next_state) if next_state in states else states.index(next_state)
-                    transitions[(i, sym)] = existing_index
-        if not new_states:
-            break
-        states.extend(new_states)
-    return states, transitions
+class LR0Automaton:
+    # States are identified by their kernel; GOTO is computed once per (state, symbol)
+    def __init__(self, productions, start_symbol):
+        self.index = index = ItemIndex(productions)
+        self.analysis = GrammarAnalysis(productions, start_symbol)
+        self.start_symbol = start_symbol
+        start = frozenset([index.prod_start[index.by_lhs[start_symbol][0]]])
+        self.kernels = [start]
+        self.state_of = {start: 0}
+        self.transitions = {}
+
+        work = deque([0])
+        while work:
+            i = work.popleft()
+            moved = {}
+            for item in sorted(index.closure(self.kernels[i])):
+                sym = index.item_next[item]
+                if sym is not None:
+                    moved.setdefault(sym, []).append(item + 1)
+            for sym, kernel in moved.items():
+                kernel = frozenset(kernel)
+                j = self.state_of.get(kernel)
+                if j is None:
+                    j = self.state_of[kernel] = len(self.kernels)
+                    self.kernels.append(kernel)
+                    work.append(j)
+                self.transitions[(i, sym)] = j
+
+    def closure_of(self, state):
+        return sorted(self.index.closure(self.kernels[state]))
+
+    def states(self):
+        item = self.index.item
+        return [[item(i) for i in self.closure_of(s)] for s in range(len(self.kernels))]
+
+def canonical_collection(productions, start_symbol):
+    automaton = LR0Automaton(productions, start_symbol)
+    return automaton.states(), automaton.transitions
+
+def _digraph(nodes, edges, initial):
+    # DeRemer & Pennello's Digraph: F(x) = initial(x) | OR{F(y) | x R y} over bitsets,
+    # one pass with SCC collapsing, written with an explicit stack
+    depth = dict.fromkeys(nodes, 0)
+    result = dict(initial)
+    stack = []
+    for root in nodes:
+        if depth[root]:
+            continue
+        stack.append(root)
+        depth[root] = len(stack)
+        calls = [(root, iter(edges.get(root, ())), len(stack))]
+        while calls:
+            x, it, d = calls[-1]
+            for y in it:
+                if depth[y] == 0:
+                    stack.append(y)
+                    depth[y] = len(stack)
+                    calls.append((y, iter(edges.get(y, ())), len(stack)))
+                    break
+                depth[x] = min(depth[x], depth[y])
+                result[x] |= result[y]
+            else:
+                calls.pop()
+                if depth[x] == d:
+                    while True:
+                        top = stack.pop()
+                        depth[top] = float("inf")
+                        if top == x:
+                            break
+                        result[top] = result[x]
+                if calls:
+                    parent = calls[-1][0]
+                    depth[parent] = min(depth[parent], depth[x])
+                    result[parent] |= result[x]
+    return result
+
+# Step 4b: LALR(1) lookaheads (DeRemer & Pennello)
+def lalr1_lookaheads(automaton):
+    index = automaton.index
+    transitions = automaton.transitions
+    analysis = automaton.analysis
+    nullable = {nt for nt in index.by_lhs if analysis.is_nullable(nt)}
+    nt_transitions = [key for key in transitions if key[1] in index.by_lhs]
+
+    # Terminals (as bitsets) and nullable nonterminals leaving each state, collected once per state
+    shifts = defaultdict(int)
+    nullable_gotos = defaultdict(list)
+    for state, sym in transitions:
+        if sym not in index.by_lhs:
+            shifts[state] |= 1 << analysis.term_id[sym]
+        elif sym in nullable:
+            nullable_gotos[state].append(sym)
+    accept_state = transitions[(0, index.prods[index.by_lhs[automaton.start_symbol][0]][1][0])]
+    shifts[accept_state] |= 1 << analysis.term_id["$"]
+
+    direct_reads = {}
+    reads = {}
+    for p, A in nt_transitions:
+        r = transitions[(p, A)]
+        direct_reads[(p, A)] = shifts[r]
+        if r in nullable_gotos:
+            reads[(p, A)] = [(r, C) for C in nullable_gotos[r]]
+
+    # Position from which the rest of each right-hand side can derive ε
+    vanishes_from = []
+    for _, rhs in index.prods:
+        i = len(rhs)
+        while i and rhs[i - 1] in nullable:
+            i -= 1
+        vanishes_from.append(i)
+
+    includes = defaultdict(list)
+    lookback = defaultdict(list)
+    by_lhs, prods = index.by_lhs, index.prods
+    for source in nt_transitions:
+        p, B = source
+        for prod in by_lhs[B]:
+            rhs = prods[prod][1]
+            last = vanishes_from[prod] - 1
+            q = p
+            for i, sym in enumerate(rhs):
+                if i >= last and sym in by_lhs:
+                    includes[(q, sym)].append(source)
+                q = transitions[(q, sym)]
+            lookback[(q, prod)].append(source)
+
+    read_sets = _digraph(nt_transitions, reads, direct_reads)
+    follow_sets = _digraph(nt_transitions, includes, read_sets)
+
+    lookaheads = {}
+    for (q, prod), sources in lookback.items():
+        la = 0
+        for source in sources:
+            la |= follow_sets[source]
+        lookaheads[(q, index.prods[prod])] = analysis.names(la)
+    return lookaheads
+
+# Step 4c: Canonical LR(1) items
+class LR1Automaton:
+    # Same item index as LR(0); an LR(1) kernel is a frozenset of (item, lookahead)
+    def __init__(self, productions, start_symbol):
+        self.index = index = ItemIndex(productions)
+        self.analysis = GrammarAnalysis(productions, start_symbol)
+        self.start_symbol = start_symbol
+        self._suffix_first = {}
+
+        start = frozenset([(index.prod_start[index.by_lhs[start_symbol][0]], "$")])
+        self.kernels = [start]
+        self.closures = []
+        state_of = {start: 0}
+        self.transitions = {}
+
+        work = deque([0])
+        while work:
+            i = work.popleft()
+            items = self.closure(self.kernels[i])
+            self.closures.append(items)
+            moved = {}
+            for item in sorted(items):
+                sym = index.item_next[item]
+                if sym is not None:
+                    moved.setdefault(sym, []).extend((item + 1, la) for la in items[item])
+            for sym, kernel in moved.items():
+                kernel = frozenset(kernel)
+                j = state_of.get(kernel)
+                if j is None:
+                    j = state_of[kernel] = len(self.kernels)
+                    self.kernels.append(kernel)
+                    work.append(j)
+                self.transitions[(i, sym)] = j
+
+    def suffix_first(self, item):
+        # FIRST of the symbols after the one following the dot, and whether they can vanish
+        cached = self._suffix_first.get(item)
+        if cached is None:
+            analysis = self.analysis
+            lhs, rhs, dot = self.index.item(item)
+            bits, vanishes = analysis.first_of([analysis.encode(sym) for sym in rhs[dot + 1:]])
+            cached = self._suffix_first[item] = (analysis.names(bits), vanishes)
+        return cached
+
+    def closure(self, kernel):
+        index = self.index
+        items = {}
+        work = list(kernel)
+        while work:
+            item, la = work.pop()
+            las = items.setdefault(item, set())
+            if la in las:
+                continue
+            las.add(la)
+            sym = index.item_next[item]
+            if sym in index.by_lhs:
+                terminals, vanishes = self.suffix_first(item)
+                if vanishes:
+                    terminals = terminals | {la}
+                for prod in index.by_lhs[sym]:
+                    start = index.prod_start[prod]
+                    seen = items.get(start, ())
+                    work.extend((start, t) for t in terminals if t not in seen)
+        return items
+
+    def states(self):
+        item = self.index.item
+        return [[item(i) for i in sorted(items)] for items in self.closures]
+
+    def lookaheads(self):
+        index = self.index
+        lookaheads = {}
+        for state, items in enumerate(self.closures):
+            for item, las in items.items():
+                if index.item_next[item] is None:
+                    lookaheads[(state, index.prods[index.item_prod[item]])] = las
+        return lookaheads
 
 # Step 5: Build ACTION and GOTO tables
-def build_parsing_table(states, transitions, productions, follow):
+def _set_action(action, state, symbol, value, conflicts):
+    old = action[state].get(symbol)
+    if old is not None and old != value and conflicts is not None:
+        conflicts.append((state, symbol, old, value))
+    action[state][symbol] = value
+
+def build_parsing_table(states, transitions, productions, follow, start_symbol, lookaheads=None, conflicts=None):
+    # follow[lhs] gives SLR reduce lookaheads; lookaheads[(state, (lhs, rhs))] overrides it for LALR(1)/LR(1)
     action = defaultdict(dict)
     goto_table = defaultdict(dict)
 
-    state_map = {tuple(state): i for i, state in enumerate(states)}
     for i, state in enumerate(states):
         for item in state:
             lhs, rhs, dot = item
@@ -122,18 +328,52 @@ def build_parsing_table(states, transitions, productions, follow):
                 if symbol not in productions:
                     j = transitions.get((i, symbol))
                     if j is not None:
-                        action[i][symbol] = f"s{j}"
+                        _set_action(action, i, symbol, f"s{j}", conflicts)
                 else:
                     j = transitions.get((i, symbol))
                     if j is not None:
                         goto_table[i][symbol] = j
             elif lhs != start_symbol:
-                for terminal in follow[lhs]:
-                    action[i][terminal] = f"r{lhs}->{' '.join(rhs)}"
+                reduce_on = follow[lhs] if lookaheads is None else lookaheads.get((i, (lhs, rhs)), ())
+                for terminal in reduce_on:
+                    _set_action(action, i, terminal, f"r{lhs}->{' '.join(rhs)}", conflicts)
             elif lhs == start_symbol:
-                action[i]["$"] = "accept"
+                _set_action(action, i, "$", "accept", conflicts)
     return action, goto_table
 
+TABLE_MODES = ("slr", "lalr1", "lr1")
+
+def build_tables(productions, start_symbol, mode="slr", conflicts=None):
+    # conflicts, if given, receives a (state, terminal, old, new) entry per conflicting ACTION cell
+    started = time.perf_counter()
+    conflicts = [] if conflicts is None else conflicts
+    if mode == "slr":
+        automaton = LR0Automaton(productions, start_symbol)
+        follow = defaultdict(set, {nt: automaton.analysis.follow_set(nt) for nt in productions})
+        states, transitions = automaton.states(), automaton.transitions
+        action, goto_table = build_parsing_table(states, transitions, productions, follow, start_symbol, conflicts=conflicts)
+    elif mode == "lalr1":
+        automaton = LR0Automaton(productions, start_symbol)
+        states, transitions = automaton.states(), automaton.transitions
+        action, goto_table = build_parsing_table(states, transitions, productions, None, start_symbol,
+                                                 lalr1_lookaheads(automaton), conflicts)
+    elif mode == "lr1":
+        automaton = LR1Automaton(productions, start_symbol)
+        states, transitions = automaton.states(), automaton.transitions
+        action, goto_table = build_parsing_table(states, transitions, productions, None, start_symbol,
+                                                 automaton.lookaheads(), conflicts)
+    else:
+        raise ValueError(f"Unknown table mode: {mode}")
+    stats = {
+        "mode": mode,
+        "states": len(states),
+        "action_entries": sum(len(row) for row in action.values()),
+        "goto_entries": sum(len(row) for row in goto_table.values()),
+        "conflicts": len(conflicts),
+        "seconds": time.perf_counter() - started,
+    }
+    return action, goto_table, stats
+
 # Step 6: Print everything
 def print_table(action, goto):
     print("ACTION TABLE:")
@@ -143,10 +383,18 @@ def print_table(action, goto):
     for state in sorted(goto.keys()):
         print(f"State {state}: ", goto[state])
 
+def print_report(reports):
+    print(f"{'Mode':<6} {'States':>7} {'ACTION':>7} {'GOTO':>6} {'Conflicts':>9} {'Time (ms)':>10}")
+    for r in reports:
+        print(f"{r['mode']:<6} {r['states']:>7} {r['action_entries']:>7} {r['goto_entries']:>6} "
+              f"{r['conflicts']:>9} {r['seconds'] * 1000:>10.3f}")
+
 # Execution
-first = compute_first(productions)
-follow = compute_follow(productions, start_symbol, first)
-states, transitions = canonical_collection(productions)
-action_table, goto_table = build_parsing_table(states, transitions, productions, follow)
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else "slr"
+    productions, start_symbol = augment_grammar(productions)
+    action_table, goto_table, _ = build_tables(productions, start_symbol, mode)
 
-print_table(action_table, goto_table)
+    print_table(action_table, goto_table)
+    print()
+    print_report([build_tables(productions, start_symbol, m)[2] for m in TABLE_MODES])
@@ -0,0 +1,76 @@
+# Scoped symbol table over interned identifiers.
+# Every identifier is interned once, by the lexer, to a small integer id that tokens and
+# AST nodes carry; ids index flat lists, so later phases never hash the string again. Each id keeps a stack of the symbols
+# bound to it, innermost last, which makes lookup O(1) at any nesting depth.
+
+class Symbol:
+    __slots__ = ("id", "name", "type", "depth", "defs", "uses")
+
+    def __init__(self, id, name, type, depth):
+        self.id = id
+        self.name = name
+        self.type = type
+        self.depth = depth
+        self.defs = []
+        self.uses = []
+
+    def __repr__(self):
+        return f"Symbol({self.name!r}, {self.type!r}, depth={self.depth})"
+
+class SymbolTable:
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+        self.bindings = []
+        self.scopes = [[]]
+        self.symbols = []
+
+    def intern(self, name):
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.bindings.append([])
+        return i
+
+    @property
+    def depth(self):
+        return len(self.scopes) - 1
+
+    def enter_scope(self):
+        self.scopes.append([])
+
+    def exit_scope(self):
+        if len(self.scopes) == 1:
+            raise ValueError("Cannot leave the global scope")
+        for i in self.scopes.pop():
+            self.bindings[i].pop()
+
+    def lookup(self, i):
+        stack = self.bindings[i]
+        return stack[-1] if stack else None
+
+    def define(self, i, type, position=None):
+        # Redefining a name in the same scope adds a def site; an inner scope shadows it
+        symbol = self.lookup(i)
+        if symbol is None or symbol.depth != self.depth:
+            symbol = Symbol(i, self.names[i], type, self.depth)
+            self.bindings[i].append(symbol)
+            self.scopes[-1].append(i)
+            self.symbols.append(symbol)
+        elif symbol.type != type:
+            raise ValueError(f"{symbol.name} redefined as {type}, was {symbol.type}")
+        if position is not None:
+            symbol.defs.append(position)
+        return symbol
+
+    def use(self, i, position=None):
+        # Records a use site; returns None when the name is not bound in any open scope
+        symbol = self.lookup(i)
+        if symbol is not None and position is not None:
+            symbol.uses.append(position)
+        return symbol
+
+    def resolve(self, name):
+        i = self.ids.get(name)
+        return None if i is None else self.lookup(i)
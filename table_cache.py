@@ -0,0 +1,115 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+
+from ll1 import LL1Parser
+from lr_parser import PackedTables
+
+# Cache file layout (native byte order, recorded in the fingerprint):
+#   b"PTC2" | uint32 meta length | SHA-256 of the rest | JSON meta, padded to 4 bytes | int32 arrays back to back
+# meta["arrays"] lists [name, byte offset, item count] so arrays are mapped, never copied.
+# A file whose digest does not match is treated like a missing one and rebuilt.
+MAGIC = b"PTC2"
+HEADER = struct.Struct("=4sI32s")
+FORMAT_VERSION = 3
+CACHE_DIR = os.environ.get("PARSE_TABLE_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".table_cache"))
+
+def grammar_fingerprint(productions, terminals=(), kind=""):
+    payload = json.dumps([FORMAT_VERSION, sys.byteorder, kind, list(productions.items()), sorted(terminals)],
+                         ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def save_tables(path, meta, arrays):
+    header_meta = dict(meta, arrays=[])
+    offset = 0
+    for name, values in arrays.items():
+        header_meta["arrays"].append([name, offset, len(values)])
+        offset += 4 * len(values)
+    blob = json.dumps(header_meta, ensure_ascii=False).encode("utf-8")
+    blob += b" " * (-(HEADER.size + len(blob)) % 4)
+    chunks = [values if isinstance(values, array) and values.typecode == "i" else array("i", values)
+              for values in arrays.values()]
+    digest = hashlib.sha256(blob)
+    for chunk in chunks:
+        digest.update(chunk)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(blob), digest.digest()) + blob)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp, path)
+
+def load_tables(path):
+    # Raises ValueError for anything but an intact cache file
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mm) < HEADER.size:
+        raise ValueError(f"Not a parse table cache file: {path}")
+    magic, meta_len, digest = HEADER.unpack_from(mm)
+    if magic != MAGIC:
+        raise ValueError(f"Not a parse table cache file: {path}")
+    if hashlib.sha256(memoryview(mm)[HEADER.size:]).digest() != digest:
+        raise ValueError(f"Corrupt parse table cache file: {path}")
+    data_start = HEADER.size + meta_len
+    meta = json.loads(bytes(mm[HEADER.size:data_start]))
+    layout = meta.pop("arrays", None) if isinstance(meta, dict) else None
+    if not isinstance(layout, list) or not all(
+            isinstance(entry, list) and len(entry) == 3 and isinstance(entry[0], str)
+            and all(isinstance(n, int) and n >= 0 for n in entry[1:]) for entry in layout):
+        raise ValueError(f"Bad parse table cache metadata: {path}")
+    if any(data_start + offset + 4 * count > len(mm) for _, offset, count in layout):
+        raise ValueError(f"Truncated parse table cache file: {path}")
+    view = memoryview(mm)
+    arrays = {name: view[data_start + offset:data_start + offset + 4 * count].cast("i")
+              for name, offset, count in layout}
+    return meta, arrays
+
+def _cached(kind, key, build, restore, cache_dir):
+    # restore(meta, arrays) failing on a loaded file counts as a cache miss, like a failed load
+    path = os.path.join(cache_dir or CACHE_DIR, f"{kind}-{key}.bin")
+    try:
+        return restore(*load_tables(path))
+    except (OSError, ValueError, KeyError, TypeError, IndexError):
+        pass
+    meta, arrays = build()
+    try:
+        save_tables(path, meta, arrays)
+    except OSError:
+        # An unwritable cache only costs the rebuild next time
+        pass
+    return restore(meta, arrays)
+
+def cached_lr_tables(productions, mode="lalr1", cache_dir=None):
+    key = grammar_fingerprint(productions, kind=f"lr:{mode}")
+    return _cached("lr", key, lambda: PackedTables.from_grammar(productions, mode).dump(), PackedTables.restore,
+                   cache_dir)
+
+def cached_ll1_parser(grammar, terminals, cache_dir=None):
+    def build():
+        parser = LL1Parser(grammar, terminals)
+        parser.construct_parse_table()
+        return parser.dump()
+
+    key = grammar_fingerprint(grammar, terminals, kind="ll1")
+    return _cached("ll1", key, build, lambda meta, arrays: LL1Parser.restore(grammar, terminals, meta, arrays),
+                   cache_dir)
+
+if __name__ == "__main__":
+    from lr_parser import ada_grammar, lr_parse
+    from ll1 import grammar, terminals
+    from ada import tokenize
+
+    for attempt in ("cold", "warm"):
+        started = time.perf_counter()
+        tables = cached_lr_tables(ada_grammar)
+        parser = cached_ll1_parser(grammar, terminals)
+        print(f"{attempt}: loaded tables in {(time.perf_counter() - started) * 1e6:.0f} µs")
+    print(lr_parse(tables, tokenize("x := (a + 3) * b;")), "tokens parsed with cached LR tables")
+    print(parser.parse(["id", "+", "id", "*", "id"]), "tokens parsed with cached LL(1) table")
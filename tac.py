@@ -1,14 +1,60 @@
-import re
+import sys
+
+from ir import CONST, IRProgram, Quad
+from lexer import Lexer
+from optimizer import optimize, print_report
+from precedence import CLOSE, OPEN, parse_operators
+
+token_spec = [
+    # One kind per operator, so translate_expression finds a token's role with a single lookup.
+    # The regex tries alternatives in order: frequent tokens first, two-character operators
+    # before their one-character prefixes.
+    ('NUMBER', r'\d+'), ('ID', r'[a-zA-Z_]\w*'), ('SKIP', r'[ \t]+'),
+    ('PLUS', r'\+'), ('MINUS', r'-'), ('MULT', r'\*'), ('DIV', r'/'),
+    ('LPAREN', r'\('), ('RPAREN', r'\)'), ('MOD', r'%'),
+    ('LE', r'<='), ('GE', r'>='), ('EQ', r'=='), ('NE', r'!='), ('LT', r'<'), ('GT', r'>'),
+    ('ASSIGN', r'='),
+]
+lexer = Lexer(token_spec)
+
+# Binding power of each binary operator kind; unary minus binds tighter than all of them
+PRECEDENCE = {'LT': 1, 'LE': 1, 'GT': 1, 'GE': 1, 'EQ': 1, 'NE': 1,
+              'PLUS': 2, 'MINUS': 2, 'MULT': 3, 'DIV': 3, 'MOD': 3}
+PREFIX = {'-': 4}
+
+def read_statements(path):
+    # One statement per line, read lazily; blank lines are yielded too so positions stay line numbers
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            yield line.strip()
 
 class IntermediateCodeGenerator:
     def __init__(self):
-        self.temp_counter = 1
-        self.tac_lines = []
+        self.program = IRProgram()
+        self.errors = []
+        # Token roles for translate_expression, by token kind (see precedence.py)
+        program = self.program
+        code, new_temp = program.code, program.new_temp
+
+        def binary(op, a, b):
+            # program.emit without the extra call, as this runs once per operator
+            dst = new_temp()
+            code.append(Quad(op, dst, a, b))
+            return dst
+
+        self.classes = dict(PRECEDENCE, NUMBER=lambda token: program.const(int(token[1])),
+                            ID=lambda token: program.var(token[1]), LPAREN=OPEN, RPAREN=CLOSE)
+        self.binary = binary
+
+    @property
+    def tac_lines(self):
+        return self.program.lines()
 
     def get_temp(self):
-        temp = f"t{self.temp_counter}"
-        self.temp_counter += 1
-        return temp
+        return self.program.new_temp()
+
+    def operand(self, token):
+        return self.program.const(int(token)) if token.isdigit() else self.program.var(token)
 
     def precedence(self, op):
         if op in ['+', '-']:
@@ -17,66 +63,149 @@ class IntermediateCodeGenerator:
             return 2
         return 0
 
-    def infix_to_postfix(self, expr):
+    def infix_to_postfix(self, tokens):
         output = []
         stack = []
-        tokens = re.findall(r'\d+|[a-zA-Z_]\w*|[()+\-*/]', expr)
-        for token in tokens:
-            if re.match(r'\d+|[a-zA-Z_]\w*', token):
+        for kind, token, _, column in tokens:
+            if kind == 'NUMBER' or kind == 'ID':
                 output.append(token)
-            elif token == '(':
+            elif kind == 'LPAREN':
                 stack.append(token)
-            elif token == ')':
+            elif kind == 'RPAREN':
                 while stack and stack[-1] != '(':
                     output.append(stack.pop())
+                if not stack:
+                    raise SyntaxError(f"Unmatched ')' at column {column}")
                 stack.pop()
-            else:
+            elif kind in ('PLUS', 'MINUS', 'MULT', 'DIV'):
                 while stack and self.precedence(token) <= self.precedence(stack[-1]):
                     output.append(stack.pop())
                 stack.append(token)
+            else:
+                raise SyntaxError(f"Unexpected {token!r} at column {column}")
         while stack:
-            output.append(stack.pop())
+            token = stack.pop()
+            if token == '(':
+                raise SyntaxError("Missing closing parenthesis")
+            output.append(token)
         return output
 
     def generate_tac_from_postfix(self, postfix):
         stack = []
         for token in postfix:
             if token not in '+-*/':
-                stack.append(token)
+                stack.append(self.operand(token))
             else:
+                if len(stack) < 2:
+                    raise SyntaxError(f"Missing operand for {token!r}")
                 b = stack.pop()
                 a = stack.pop()
-                temp = self.get_temp()
-                self.tac_lines.append(f"{temp} = {a} {token} {b}")
-                stack.append(temp)
+                stack.append(self.program.emit(token, self.get_temp(), a, b))
+        if len(stack) != 1:
+            raise SyntaxError("Missing operator" if stack else "Empty expression")
         return stack[0]
 
-    def generate_tac(self, statement):
-        statement = statement.replace(" ", "")
-        if "=" in statement:
-            var, expr = statement.split("=")
-            postfix = self.infix_to_postfix(expr)
-            final_temp = self.generate_tac_from_postfix(postfix)
-            self.tac_lines.append(f"{var} = {final_temp}")
-        else:
-            print("Invalid statement!")
+    def negate(self, op, a):
+        program = self.program
+        if a & 3 == CONST:
+            return program.const(-program.value_of(a))
+        return program.emit('-', self.get_temp(), program.const(0), a)
+
+    def translate_expression(self, tokens, pos=0):
+        # Single pass: each quad is emitted as soon as its operands are complete, so temps are
+        # numbered in emission order, as the two-pass path does
+        return parse_operators(tokens, pos, self.classes, self.binary, PREFIX, self.negate)[0]
+
+    def generate_tac(self, statement, two_pass=False):
+        # Lexes the statement once; a failed statement leaves no quads or temps behind.
+        # two_pass goes through infix_to_postfix, which only knows + - * / and parentheses.
+        tokens = list(lexer.tokenize(statement))
+        if len(tokens) < 2 or tokens[0].kind != 'ID' or tokens[1].kind != 'ASSIGN':
+            raise SyntaxError("Invalid statement, expected 'name = expression'")
+        program = self.program
+        start, n_temps = len(program.code), program.n_temps
+        try:
+            if two_pass:
+                final_temp = self.generate_tac_from_postfix(self.infix_to_postfix(tokens[2:]))
+            else:
+                final_temp = self.translate_expression(tokens, 2)
+        except SyntaxError:
+            del program.code[start:]
+            program.n_temps = n_temps
+            raise
+        program.emit('copy', program.var(tokens[0].value), final_temp)
+
+    def report_error(self, number, statement, error):
+        self.errors.append((number, statement, str(error)))
+
+    def stream_tac(self, statements, on_error=None):
+        # Yields TAC lines as each statement is translated, then clears the program, quads,
+        # names and constants alike, so memory stays flat however long the stream is. Temps
+        # are numbered from t1 again in every statement, so a statement's TAC does not depend
+        # on what came before it.
+        on_error = on_error or self.report_error
+        program = self.program
+        code = program.code
+        for number, statement in enumerate(statements, start=1):
+            if not statement or statement.isspace():
+                continue
+            try:
+                self.generate_tac(statement)
+            except SyntaxError as e:
+                on_error(number, statement, e)
+            else:
+                for quad in code:
+                    yield program.format(quad)
+            program.clear()
+
+    def write_tac(self, statements, writer, on_error=None):
+        count = 0
+        write = writer.write
+        for line in self.stream_tac(statements, on_error):
+            write(line)
+            write("\n")
+            count += 1
+        return count
+
+    def optimize(self):
+        return optimize(self.program)
 
     def print_tac(self):
         for line in self.tac_lines:
             print(line)
 
-def main():
+def main(argv=()):
     code_generator = IntermediateCodeGenerator()
+    if argv:
+        # Streams each file straight to stdout
+        for path in argv:
+            code_generator.write_tac(read_statements(path), sys.stdout)
+        for number, statement, error in code_generator.errors:
+            print(f"line {number}: {statement}: {error}", file=sys.stderr)
+        return 1 if code_generator.errors else 0
+
     statements = [
         "a=(c+d)*4",
         "b=d*2",
         "y=z/2",
-        "k=x%2"
+        "k=x%2",
+        "n=-(a-b)*-3",
+        "f=a+1<=b*2"
     ]
 
     for statement in statements:
-        code_generator.generate_tac(statement)
+        try:
+            code_generator.generate_tac(statement)
+        except SyntaxError as e:
+            print(f"{statement}: {e}")
+    code_generator.print_tac()
+
+    print("\nOptimized:")
+    before = len(code_generator.program.code)
+    report = code_generator.optimize()
     code_generator.print_tac()
+    print_report(report, before, len(code_generator.program.code))
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,138 @@
+# Assembler and interpreter for the LOAD/MOV/arithmetic/comparison target code.
+#
+# Each instruction is four ints in an array('i'): opcode, then up to three operands.
+# Registers and variable slots are resolved to indices at assembly time and
+# constants go to a pool, so the dispatch loop only does integer indexing.
+
+import re
+import time
+from array import array
+
+from ir import evaluate
+from regalloc import OPCODES
+
+LOADK, LOADM, STORE, ADD, SUB, MUL, DIV, MOD, LT, LE, GT, GE, EQ, NE = range(14)
+ARITH = {"ADD": ADD, "SUB": SUB, "MUL": MUL, "DIV": DIV, "MOD": MOD,
+         "LT": LT, "LE": LE, "GT": GT, "GE": GE, "EQ": EQ, "NE": NE}
+# Source operator of each opcode that falls back to ir.evaluate
+OPERATORS = {ARITH[name]: op for op, name in OPCODES.items()}
+REGISTER = re.compile(r"R(\d+)$")
+NUMBER = re.compile(r"-?\d+$")
+
+class Bytecode:
+    def __init__(self, code, n_registers, variables, consts):
+        self.code = code
+        self.n_registers = n_registers
+        self.variables = variables
+        self.consts = consts
+
+    def __len__(self):
+        return len(self.code) // 4
+
+def parse_instruction(line):
+    # "ADD R2, R0, R1" -> ("ADD", "R2", "R0", "R1")
+    op, _, rest = line.strip().partition(" ")
+    return (op, *(part.strip() for part in rest.split(",") if part.strip()))
+
+def assemble(instructions):
+    # instructions are tuples from regalloc.allocate() or text lines as printed by the code generators
+    code = array("i")
+    slots, consts = {}, {}
+    n_registers = 0
+
+    def register(name):
+        nonlocal n_registers
+        m = REGISTER.match(name)
+        if m is None:
+            raise ValueError(f"Expected a register, got {name!r}")
+        n_registers = max(n_registers, int(m.group(1)) + 1)
+        return int(m.group(1))
+
+    def slot(name):
+        return slots.setdefault(name, len(slots))
+
+    for ins in instructions:
+        if isinstance(ins, str):
+            if not ins.strip():
+                continue
+            ins = parse_instruction(ins)
+        op = ins[0]
+        if op == "LOAD":
+            if NUMBER.match(ins[2]):
+                code.extend((LOADK, register(ins[1]), consts.setdefault(int(ins[2]), len(consts)), 0))
+            else:
+                code.extend((LOADM, register(ins[1]), slot(ins[2]), 0))
+        elif op == "MOV":
+            code.extend((STORE, slot(ins[1]), register(ins[2]), 0))
+        elif op in ARITH:
+            code.extend((ARITH[op], register(ins[1]), register(ins[2]), register(ins[3])))
+        else:
+            raise ValueError(f"Unknown instruction: {' '.join(ins)}")
+    return Bytecode(code, n_registers, list(slots), list(consts))
+
+def execute(bytecode, memory=None):
+    # Runs the program; memory maps variable names to initial values (default 0). Returns the final memory.
+    code = bytecode.code
+    consts = bytecode.consts
+    regs = [0] * bytecode.n_registers
+    mem = [0] * len(bytecode.variables)
+    if memory:
+        for i, name in enumerate(bytecode.variables):
+            mem[i] = memory.get(name, 0)
+    pc, end = 0, len(code)
+    while pc < end:
+        op = code[pc]
+        x = code[pc + 1]
+        if op == LOADM:
+            regs[x] = mem[code[pc + 2]]
+        elif op == STORE:
+            mem[x] = regs[code[pc + 2]]
+        elif op == LOADK:
+            regs[x] = consts[code[pc + 2]]
+        elif op == ADD:
+            regs[x] = regs[code[pc + 2]] + regs[code[pc + 3]]
+        elif op == SUB:
+            regs[x] = regs[code[pc + 2]] - regs[code[pc + 3]]
+        elif op == MUL:
+            regs[x] = regs[code[pc + 2]] * regs[code[pc + 3]]
+        elif op == DIV:
+            a, b = regs[code[pc + 2]], regs[code[pc + 3]]
+            q = abs(a) // abs(b)
+            regs[x] = q if (a < 0) == (b < 0) else -q
+        else:
+            regs[x] = evaluate(OPERATORS[op], regs[code[pc + 2]], regs[code[pc + 3]])
+        pc += 4
+    return dict(zip(bytecode.variables, mem))
+
+def benchmark(bytecode, memory=None, repeat=5, min_time=0.2):
+    # Best-of-repeat timing; reports executed instructions per second
+    best = float("inf")
+    runs = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        runs_this = 0
+        while True:
+            execute(bytecode, memory)
+            runs_this += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / runs_this)
+        runs += runs_this
+    return {"instructions": len(bytecode), "seconds": best, "instructions_per_sec": len(bytecode) / best}
+
+if __name__ == "__main__":
+    from mini_compiler import build_parse_tree, lex
+    from ir import IRProgram, lower
+    from optimizer import optimize
+    from regalloc import allocate
+
+    source = "a = 3 + 5\nb = a * x\nc = (b - 4) / 2\nd = c + b * x\n"
+    program = lower(IRProgram(), [build_parse_tree(tokens) for _, _, tokens in lex(source) if tokens])
+    optimize(program)
+    instructions, _ = allocate(program)
+    bytecode = assemble(instructions)
+    result = execute(bytecode, {"x": 7})
+    print({name: result[name] for name in program.names})
+    r = benchmark(bytecode, {"x": 7})
+    print(f"{r['instructions']} instructions, {r['instructions_per_sec']:,.0f} instructions/sec")
@@ -0,0 +1,82 @@
+# Seeded synthetic inputs for benchmarks: the same arguments always give the same text
+# or grammar, so timings from different runs and machines describe the same work.
+
+import random
+
+def generate_program(n_statements, seed=0, n_names=64):
+    # Ada syntax: "name := expr;" per line, with some parenthesised left operands
+    rnd = random.Random(seed)
+    names = [f"v{i}" for i in range(n_names)]
+    lines = []
+    for _ in range(n_statements):
+        expr = rnd.choice(names)
+        for _ in range(rnd.randint(1, 6)):
+            operand = rnd.choice(names) if rnd.random() < 0.5 else str(rnd.randint(0, 999))
+            expr = f"({expr} {rnd.choice('+-*/')} {operand})" if rnd.random() < 0.3 else f"{expr} {rnd.choice('+-*/')} {operand}"
+        lines.append(f"{rnd.choice(names)} := {expr};")
+    return "\n".join(lines)
+
+def generate_assignments(n_statements, seed=0, n_names=32, ops="+-*/"):
+    # mini_compiler syntax: one "name = expr" per line; * and / only take constant
+    # right operands so values stay small and never divide by zero
+    rnd = random.Random(seed)
+    names = [f"v{i}" for i in range(n_names)]
+    lines = []
+    for _ in range(n_statements):
+        expr = rnd.choice(names)
+        for _ in range(rnd.randint(1, 4)):
+            op = rnd.choice(ops)
+            operand = rnd.choice(names) if op in "+-" and rnd.random() < 0.6 else str(rnd.randint(1, 9))
+            expr = f"({expr}) {op} {operand}" if rnd.random() < 0.3 else f"{expr} {op} {operand}"
+        lines.append(f"{rnd.choice(names)} = {expr}")
+    return "\n".join(lines)
+
+def nested_statement(depth, assign=":="):
+    # x := a - (a - (... 1 ...)); nesting depth is the number of parentheses
+    return f"x {assign} " + "a - (" * depth + "1" + ")" * depth + (";" if assign == ":=" else "")
+
+def chain_statement(length, assign=":="):
+    # x := a + a + ... + a with length operands
+    return f"x {assign} " + " + ".join(["a"] * length) + (";" if assign == ":=" else "")
+
+def generate_grammar(n_nonterminals, seed=0):
+    # Expression-like layers: each is left-recursive, some alternatives share prefixes, a few symbols are useless
+    rnd = random.Random(seed)
+    grammar = {}
+    for i in range(n_nonterminals):
+        nt, below = f"N{i}", f"N{i + 1}" if i + 1 < n_nonterminals else "x"
+        alternatives = [[nt, f"op{i}", below], [below]]
+        if rnd.random() < 0.3:
+            alternatives += [[f"k{i}", below, "a"], [f"k{i}", below, "b"]]
+        if rnd.random() < 0.1:
+            alternatives.append([f"Dead{i}"])
+            grammar[f"Dead{i}"] = [[f"Dead{i}", "z"]]
+        grammar[nt] = alternatives
+    return grammar
+
+def random_grammar(n_nonterminals, n_terminals=None, seed=0, max_alternatives=3, max_length=4,
+                   left_recursion=0.2, epsilon=0.1):
+    # Every nonterminal derives a terminal string and is reachable from N0: its first alternative
+    # mentions only terminals and the next nonterminal. The other alternatives are arbitrary,
+    # so the grammar has cycles, left recursion and epsilon rules in the given proportions.
+    rnd = random.Random(seed)
+    n_terminals = n_terminals or max(2, n_nonterminals // 2)
+    nonterminals = [f"N{i}" for i in range(n_nonterminals)]
+    terminals = [f"t{i}" for i in range(n_terminals)]
+    symbols = nonterminals + terminals
+    grammar = {}
+    for i, nt in enumerate(nonterminals):
+        first = [rnd.choice(terminals)]
+        if i + 1 < n_nonterminals:
+            first.insert(rnd.randint(0, 1), nonterminals[i + 1])
+        alternatives = [first]
+        for _ in range(rnd.randint(0, max_alternatives - 1)):
+            if rnd.random() < epsilon:
+                alternatives.append(["ε"])
+                continue
+            rhs = [rnd.choice(symbols) for _ in range(rnd.randint(1, max_length))]
+            if rnd.random() < left_recursion:
+                rhs[0] = nt
+            alternatives.append(rhs)
+        grammar[nt] = alternatives
+    return grammar